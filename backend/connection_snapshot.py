@@ -0,0 +1,25 @@
+"""
+Per-Cycle Connection Snapshot
+One socket enumeration shared by every network detector in a collection cycle
+"""
+
+import time
+from typing import Iterator, List
+
+from proc_net import Connection
+
+
+class ConnectionSnapshot:
+    """Established connections captured once, tagged with a monotonically increasing generation"""
+
+    def __init__(self, generation: int, connections: List[Connection], source: str):
+        self.generation = generation
+        self.connections = connections
+        self.source = source
+        self.collected_at = time.time()
+
+    def __len__(self) -> int:
+        return len(self.connections)
+
+    def __iter__(self) -> Iterator[Connection]:
+        return iter(self.connections)
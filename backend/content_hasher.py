@@ -0,0 +1,119 @@
+"""
+Parallel Content Hasher
+SHA-256 plus a fast non-cryptographic hash per file, read in large chunks in a thread pool and cached by file identity
+"""
+
+import hashlib
+import os
+import threading
+import zlib
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Optional, Tuple
+
+try:
+    import xxhash
+except ImportError:  # crc32 is the stdlib fallback for dedup hashing
+    xxhash = None
+
+FileHashes = namedtuple('FileHashes', ['sha256', 'fast_hash'])
+
+FAST_HASH_NAME = 'xxh64' if xxhash is not None else 'crc32'
+
+
+class _FastHash:
+    """Incremental xxh64, or crc32 when xxhash is not installed"""
+
+    def __init__(self):
+        self._xxh = xxhash.xxh64() if xxhash is not None else None
+        self._crc = 0
+
+    def update(self, data):
+        if self._xxh is not None:
+            self._xxh.update(data)
+        else:
+            self._crc = zlib.crc32(data, self._crc)
+
+    def hexdigest(self) -> str:
+        if self._xxh is not None:
+            return self._xxh.hexdigest()
+        return f"{self._crc & 0xFFFFFFFF:08x}"
+
+
+def file_identity(st: os.stat_result) -> Tuple[int, int, int, int]:
+    """Cache key: a file is only re-read when device, inode, mtime or size change"""
+    return (st.st_dev, st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+class ContentHasher:
+    def __init__(self, max_workers: int = 4, max_size: int = 64 * 1024 * 1024,
+                 chunk_size: int = 1024 * 1024, cache_size: int = 100000):
+        self.max_size = max_size
+        self.chunk_size = chunk_size
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[Tuple[int, int, int, int], FileHashes]" = OrderedDict()
+        self._lock = threading.Lock()
+        # hashlib and zlib release the GIL on large buffers, so threads hash in parallel
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="content-hasher")
+
+    def _cached(self, key) -> Optional[FileHashes]:
+        with self._lock:
+            hashes = self._cache.get(key)
+            if hashes is not None:
+                self._cache.move_to_end(key)
+            return hashes
+
+    def _store(self, key, hashes: FileHashes):
+        with self._lock:
+            self._cache[key] = hashes
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _read_and_hash(self, path: str, st: os.stat_result) -> Optional[FileHashes]:
+        if st.st_size > self.max_size:
+            return None
+        # Buffered reads rather than mmap: a file truncated while mapped raises SIGBUS
+        sha256 = hashlib.sha256()
+        fast_hash = _FastHash()
+        buffer = bytearray(self.chunk_size)
+        view = memoryview(buffer)
+        try:
+            with open(path, 'rb', buffering=0) as f:
+                while True:
+                    length = f.readinto(buffer)
+                    if not length:
+                        break
+                    sha256.update(view[:length])
+                    fast_hash.update(view[:length])
+        except OSError:
+            return None
+        return FileHashes(sha256.hexdigest(), fast_hash.hexdigest())
+
+    def hash_file(self, path: str, st: Optional[os.stat_result] = None) -> Optional[FileHashes]:
+        """Hashes for one file, or None if it is unreadable or larger than max_size"""
+        try:
+            st = st or os.stat(path)
+        except OSError:
+            return None
+        key = file_identity(st)
+        hashes = self._cached(key)
+        if hashes is None:
+            hashes = self._read_and_hash(path, st)
+            if hashes is not None:
+                self._store(key, hashes)
+        return hashes
+
+    def hash_files(self, files: Iterable[Tuple[str, os.stat_result]]) -> Dict[str, Optional[FileHashes]]:
+        """Hash many files; cache hits are answered inline and misses are read in parallel"""
+        results = {}
+        pending = {}
+        for path, st in files:
+            hashes = self._cached(file_identity(st))
+            if hashes is not None:
+                results[path] = hashes
+            else:
+                pending[path] = self._pool.submit(self.hash_file, path, st)
+        for path, future in pending.items():
+            results[path] = future.result()
+        return results
@@ -0,0 +1,289 @@
+"""
+Detector Registry
+Detectors declare their own interval, timeout and cost budget; the registry schedules them independently
+and starts due detectors in a bounded thread pool without waiting on each other
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+
+@dataclass(frozen=True)
+class DetectorSpec:
+    """One independently scheduled detector.
+
+    `run` returns the keys it contributes to the merged threat report.
+    `timeout` is how long a run may take before it is reported as timed
+    out; `budget` is the run time it should normally stay under, and
+    runs that exceed it push the detector's next run further out.
+    `stats`, if given, adds detector-specific counters to its status.
+    """
+    name: str
+    run: Callable[[], Dict[str, Any]]
+    interval: float
+    timeout: float = 30.0
+    budget: float = 1.0
+    stats: Optional[Callable[[], Optional[Dict[str, Any]]]] = None
+
+
+class DetectorState:
+    __slots__ = ('spec', 'interval', 'backoff', 'next_run', 'running', 'started_at',
+                 'duration', 'result', 'error', 'status', 'runs', 'overruns', 'updated_at')
+
+    def __init__(self, spec: DetectorSpec):
+        self.spec = spec
+        self.interval = spec.interval
+        self.backoff = 1
+        self.next_run = 0.0
+        self.running = False
+        self.started_at: Optional[float] = None
+        self.duration: Optional[float] = None
+        self.result: Dict[str, Any] = {}
+        self.error: Optional[str] = None
+        self.status = "pending"
+        self.runs = 0
+        self.overruns = 0
+        self.updated_at: Optional[float] = None
+
+
+class DetectorRegistry:
+    """Schedules detectors and runs each one as soon as it is due.
+
+    With more than one worker, run_due() submits due detectors and
+    returns at once, so a slow detector never holds back a fast one;
+    finished runs are recorded from the worker threads and
+    check_deadlines() marks the ones that passed their timeout. A
+    detector that times out keeps running in the background; its
+    previous result is served until the late one is recorded.
+    """
+
+    MAX_BACKOFF = 8
+
+    def __init__(self, max_workers: int = 4):
+        self.max_workers = max_workers
+        self._states: "OrderedDict[str, DetectorState]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._changed = threading.Condition(self._lock)
+        self._deadlines: Dict[str, float] = {}  # running detectors that have not yet timed out
+        self.revision = 0  # bumped whenever a run is recorded, including late ones, or times out
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="detector") if max_workers > 1 else None
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._states
+
+    @property
+    def names(self) -> List[str]:
+        return list(self._states)
+
+    def register(self, spec: DetectorSpec):
+        if spec.name in self._states:
+            raise ValueError(f"Detector already registered: {spec.name}")
+        self._states[spec.name] = DetectorState(spec)
+
+    def set_intervals(self, intervals: Dict[str, float]):
+        """Override declared intervals, e.g. from configuration"""
+        for name, interval in intervals.items():
+            if name in self._states:
+                self._states[name].interval = interval
+            else:
+                print(f"Ignoring interval for unknown detector: {name}")
+
+    @staticmethod
+    def parse_intervals(value: Optional[str]) -> Dict[str, float]:
+        """Parse `files=60,network=2` into a name -> seconds map"""
+        intervals = {}
+        for item in (value or '').split(','):
+            name, separator, seconds = item.partition('=')
+            if not separator:
+                continue
+            try:
+                intervals[name.strip()] = float(seconds)
+            except ValueError:
+                print(f"Ignoring invalid detector interval: {item}")
+        return intervals
+
+    def due(self, now: Optional[float] = None) -> List[DetectorSpec]:
+        """Detectors whose next run time has passed and that are not already running"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            return [state.spec for state in self._states.values() if not state.running and state.next_run <= now]
+
+    def next_due(self) -> Optional[float]:
+        """Monotonic time at which the next idle detector becomes due or a running one times out"""
+        with self._lock:
+            times = [state.next_run for state in self._states.values() if not state.running]
+            times.extend(self._deadlines.values())
+        return min(times) if times else None
+
+    def run_soon(self, name: str):
+        """Make a detector due at the next scheduler tick"""
+        with self._lock:
+            self._states[name].next_run = 0.0
+
+    def mark_started(self, name: str, now: Optional[float] = None) -> bool:
+        """Claim a detector for a run; False if it is already running"""
+        with self._lock:
+            state = self._states[name]
+            if state.running:
+                return False
+            state.running = True
+            state.started_at = time.monotonic() if now is None else now
+            return True
+
+    def mark_timed_out(self, name: str):
+        """Report a run still in progress past its timeout; its previous result stays in place"""
+        with self._lock:
+            state = self._states[name]
+            if state.running:
+                state.status = "timed_out"
+
+    def record(self, name: str, result: Optional[Dict[str, Any]], error: Optional[str] = None,
+               now: Optional[float] = None):
+        """Store a finished run and schedule the next one"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            state = self._states[name]
+            spec = state.spec
+            state.running = False
+            self._deadlines.pop(name, None)
+            state.runs += 1
+            state.duration = now - state.started_at if state.started_at is not None else 0.0
+            if error is None:
+                state.result = result or {}
+                state.error = None
+                state.updated_at = time.time()
+                # A result that arrives after its deadline passed is still the freshest one
+                state.status = "late" if state.duration > spec.timeout else "ok"
+            else:
+                # Keep serving the previous result rather than dropping the detector's keys
+                state.error = error
+                state.status = "error"
+
+            # Expensive runs are spaced out until they fit the budget again
+            if state.duration > spec.budget:
+                state.overruns += 1
+                state.backoff = min(state.backoff * 2, self.MAX_BACKOFF)
+            elif state.backoff > 1:
+                state.backoff //= 2
+            self.revision += 1
+            state.next_run = (state.started_at if state.started_at is not None else now) + state.interval * state.backoff
+            self._changed.notify_all()
+
+    def _execute(self, spec: DetectorSpec):
+        try:
+            result = spec.run()
+        except Exception as e:
+            print(f"Error in detector {spec.name}: {e}")
+            self.record(spec.name, None, error=str(e))
+        else:
+            self.record(spec.name, result)
+
+    def submit(self, specs: List[DetectorSpec]) -> List[str]:
+        """Start detectors without waiting for them; returns the names started.
+
+        Without a pool the detectors run inline, one after another.
+        """
+        started = [spec for spec in specs if self.mark_started(spec.name)]
+        for spec in started:
+            if self._pool is None:
+                self._execute(spec)
+                continue
+            with self._lock:
+                self._deadlines[spec.name] = self._states[spec.name].started_at + spec.timeout
+            self._pool.submit(self._execute, spec)
+        return [spec.name for spec in started]
+
+    def check_deadlines(self, now: Optional[float] = None) -> List[str]:
+        """Mark running detectors that passed their timeout; returns their names"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            expired = [name for name, deadline in self._deadlines.items() if deadline <= now]
+            for name in expired:
+                # Leave it running; snapshots report a partial result instead of waiting
+                del self._deadlines[name]
+                self.mark_timed_out(name)
+            if expired:
+                self.revision += 1
+                self._changed.notify_all()
+        return expired
+
+    def wait_for_change(self, revision: int, timeout: float) -> bool:
+        """Block until the revision moves past `revision` or `timeout` seconds pass"""
+        with self._changed:
+            return self._changed.wait_for(lambda: self.revision != revision, timeout)
+
+    def run(self, specs: List[DetectorSpec]) -> List[str]:
+        """Run detectors and wait for each until it finishes or hits its timeout; returns the names started"""
+        started = self.submit(specs)
+        while True:
+            with self._lock:
+                waiting = [self._deadlines[name] for name in started if name in self._deadlines]
+                revision = self.revision
+            if not waiting:
+                return started
+            self.wait_for_change(revision, max(0.0, min(waiting) - time.monotonic()))
+            self.check_deadlines()
+
+    def run_due(self) -> List[str]:
+        """Start every due detector without waiting for it; returns the names started"""
+        self.check_deadlines()
+        return self.submit(self.due())
+
+    def run_all(self) -> Dict[str, Any]:
+        """Run every idle detector now, regardless of schedule, and return the merged results"""
+        with self._lock:
+            specs = [state.spec for state in self._states.values()]
+        self.run(specs)
+        return self.results()
+
+    def reported(self) -> bool:
+        """True once every detector has recorded a run or passed its first timeout"""
+        with self._lock:
+            return all(state.status != "pending" for state in self._states.values())
+
+    def incomplete(self) -> List[str]:
+        """Detectors whose latest run timed out or failed, i.e. whose results may be stale"""
+        with self._lock:
+            return [name for name, state in self._states.items() if state.status in ("timed_out", "error")]
+
+    def results(self) -> Dict[str, Any]:
+        """Latest result of every detector merged into one report"""
+        merged: Dict[str, Any] = {}
+        with self._lock:
+            for state in self._states.values():
+                merged.update(state.result)
+        return merged
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            states = list(self._states.items())
+        stats = {}
+        for name, state in states:
+            if state.spec.stats is not None:
+                try:
+                    stats[name] = state.spec.stats()
+                except Exception as e:
+                    print(f"Error reading stats of detector {name}: {e}")
+        with self._lock:
+            return {
+                name: {
+                    "status": state.status,
+                    "interval": state.interval,
+                    "effective_interval": state.interval * state.backoff,
+                    "running": state.running,
+                    "last_duration": state.duration,
+                    "updated_at": state.updated_at,
+                    "runs": state.runs,
+                    "overruns": state.overruns,
+                    "error": state.error,
+                    "stats": stats.get(name)
+                }
+                for name, state in self._states.items()
+            }
@@ -0,0 +1,101 @@
+"""
+Cached Directory Walker
+os.scandir-based walker that reuses DirEntry data and skips directories whose mtime has not changed
+"""
+
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+
+
+class _DirectoryListing:
+    __slots__ = ('mtime_ns', 'files', 'subdirectories', 'listed_at')
+
+    def __init__(self, mtime_ns: int, files: List[Tuple[str, os.stat_result]],
+                 subdirectories: List[str], listed_at: float):
+        self.mtime_ns = mtime_ns
+        self.files = files
+        self.subdirectories = subdirectories
+        self.listed_at = listed_at
+
+
+class DirectoryWalker:
+    """Lists regular files below a directory with one stat per file.
+
+    A directory's mtime only changes when entries are added, removed or
+    renamed, so a directory with an unchanged mtime reuses its previous
+    listing. In-place writes to existing files do not touch the directory
+    mtime; cached listings are therefore refreshed every refresh_interval
+    seconds regardless, and callers that must see such writes ask scan()
+    for fresh stats of the cached names.
+    """
+
+    def __init__(self, max_depth: int = 0, refresh_interval: float = 300):
+        self.max_depth = max_depth
+        self.refresh_interval = refresh_interval
+        self._listings: Dict[str, _DirectoryListing] = {}
+
+    def _list(self, directory: str) -> Optional[_DirectoryListing]:
+        try:
+            mtime_ns = os.stat(directory).st_mtime_ns
+        except OSError:
+            self._listings.pop(directory, None)
+            return None
+
+        cached = self._listings.get(directory)
+        if (cached is not None and cached.mtime_ns == mtime_ns
+                and time.monotonic() - cached.listed_at < self.refresh_interval):
+            return cached
+
+        files = []
+        subdirectories = []
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                try:
+                    # d_type answers is_file/is_dir without a syscall on most filesystems
+                    if entry.is_file():
+                        files.append((entry.path, entry.stat()))
+                    elif entry.is_dir(follow_symlinks=False):
+                        subdirectories.append(entry.path)
+                except OSError:
+                    continue
+        listing = _DirectoryListing(mtime_ns, files, subdirectories, time.monotonic())
+        self._listings[directory] = listing
+        return listing
+
+    def scan(self, directory: str, fresh_stats: bool = False) -> List[Tuple[str, os.stat_result]]:
+        """(path, stat) for every regular file under directory, down to max_depth levels.
+
+        With fresh_stats, every listed file is stat'ed again so in-place
+        writes show up even when the listing itself came from the cache.
+        """
+        results = []
+        visited = set()
+        pending = [(directory, 0)]
+        while pending:
+            current, depth = pending.pop()
+            visited.add(current)
+            try:
+                listing = self._list(current)
+            except OSError:
+                if current == directory:
+                    raise
+                continue
+            if listing is None:
+                continue
+            if fresh_stats:
+                for path, _ in listing.files:
+                    try:
+                        results.append((path, os.stat(path)))
+                    except OSError:
+                        continue
+            else:
+                results.extend(listing.files)
+            if depth < self.max_depth:
+                pending.extend((subdirectory, depth + 1) for subdirectory in listing.subdirectories)
+
+        # Forget listings of subdirectories that were removed or are now out of depth
+        prefix = os.path.join(directory, '')
+        for stale in [path for path in self._listings if path.startswith(prefix) and path not in visited]:
+            del self._listings[stale]
+        return results
@@ -0,0 +1,114 @@
+"""
+Incremental File Baseline
+Persistent path -> (inode, size, mtime, mode, owner, content hash) map with delta detection
+"""
+
+import os
+import struct
+from collections import namedtuple
+from typing import Dict, Iterable, List, Tuple
+
+from content_hasher import ContentHasher
+
+BaselineEntry = namedtuple('BaselineEntry', ['inode', 'size', 'mtime_ns', 'mode', 'uid', 'sha256'])
+
+BaselineDelta = namedtuple('BaselineDelta', ['path', 'change', 'fields', 'entry'])
+
+_NO_HASH = bytes(32)  # stored for files that could not be hashed
+
+
+class FileBaseline:
+    """Known state of the files in the sensitive directories.
+
+    The on-disk format is a small header followed by fixed-size records,
+    each trailed by its UTF-8 path, so loading is a single read and one
+    struct unpack per file.
+    """
+
+    MAGIC = b'FBL1'
+    _HEADER = struct.Struct('<4sI')            # magic, record count
+    _RECORD = struct.Struct('<QQqIIH32s')      # inode, size, mtime_ns, mode, uid, path length, sha256
+
+    def __init__(self, path: str, hasher: ContentHasher):
+        self.path = path
+        self.hasher = hasher
+        self.entries: Dict[str, BaselineEntry] = {}
+
+    def load(self) -> bool:
+        """Load the baseline from disk; returns False if there is none yet"""
+        try:
+            with open(self.path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return False
+
+        magic, count = self._HEADER.unpack_from(data, 0)
+        if magic != self.MAGIC:
+            raise ValueError(f"Not a file baseline: {self.path}")
+        entries = {}
+        offset = self._HEADER.size
+        for _ in range(count):
+            inode, size, mtime_ns, mode, uid, path_length, sha256 = self._RECORD.unpack_from(data, offset)
+            offset += self._RECORD.size
+            path = data[offset:offset + path_length].decode('utf-8', 'surrogateescape')
+            offset += path_length
+            entries[path] = BaselineEntry(inode, size, mtime_ns, mode, uid, b'' if sha256 == _NO_HASH else sha256)
+        self.entries = entries
+        return True
+
+    def save(self):
+        """Write the baseline atomically"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        parts = [self._HEADER.pack(self.MAGIC, len(self.entries))]
+        for path, entry in self.entries.items():
+            encoded = path.encode('utf-8', 'surrogateescape')
+            parts.append(self._RECORD.pack(entry.inode, entry.size, entry.mtime_ns, entry.mode,
+                                           entry.uid, len(encoded), entry.sha256 or _NO_HASH))
+            parts.append(encoded)
+        temporary = f"{self.path}.tmp"
+        with open(temporary, 'wb') as f:
+            f.write(b''.join(parts))
+        os.replace(temporary, self.path)
+
+    def entries_for(self, files: Iterable[Tuple[str, os.stat_result]]) -> Dict[str, BaselineEntry]:
+        """Baseline entries for scanned files; contents are only hashed when metadata changed"""
+        entries = {}
+        to_hash = []
+        for path, st in files:
+            known = self.entries.get(path)
+            if (known is not None and known.inode == st.st_ino and known.size == st.st_size
+                    and known.mtime_ns == st.st_mtime_ns):
+                entries[path] = BaselineEntry(st.st_ino, st.st_size, st.st_mtime_ns, st.st_mode,
+                                              st.st_uid, known.sha256)
+            else:
+                to_hash.append((path, st))
+
+        hashes = self.hasher.hash_files(to_hash)
+        for path, st in to_hash:
+            file_hashes = hashes.get(path)
+            sha256 = bytes.fromhex(file_hashes.sha256) if file_hashes is not None else b''
+            entries[path] = BaselineEntry(st.st_ino, st.st_size, st.st_mtime_ns, st.st_mode, st.st_uid, sha256)
+        return entries
+
+    def compare(self, current: Dict[str, BaselineEntry]) -> List[BaselineDelta]:
+        """New, changed and deleted files relative to the baseline"""
+        deltas = []
+        for path, entry in current.items():
+            known = self.entries.get(path)
+            if known is None:
+                deltas.append(BaselineDelta(path, "new", [], entry))
+                continue
+            fields = [field for field in BaselineEntry._fields if getattr(known, field) != getattr(entry, field)]
+            if fields:
+                deltas.append(BaselineDelta(path, "changed", fields, entry))
+        for path, known in self.entries.items():
+            if path not in current:
+                deltas.append(BaselineDelta(path, "deleted", [], known))
+        return deltas
+
+    def rebaseline(self, current: Dict[str, BaselineEntry]):
+        """Accept the current state as the new baseline and persist it"""
+        self.entries = dict(current)
+        self.save()
@@ -0,0 +1,273 @@
+"""
+Event-Driven File Monitor
+Keeps an in-memory index of recent changes in watched directories using Linux inotify
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import stat
+import struct
+import sys
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0x00000800
+IN_CLOEXEC = 0x00080000
+
+WATCH_MASK = (IN_CREATE | IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO |
+              IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF)
+
+_EVENT_HEADER = struct.Struct('=iIII')  # wd, mask, cookie, len
+
+FileChange = namedtuple('FileChange', ['path', 'directory', 'event', 'mtime', 'changed_at'])
+
+# Callable returning (path, stat_result) for every regular file directly in a directory
+DirectoryScanner = Callable[[str], Iterable[Tuple[str, os.stat_result]]]
+
+
+def _load_libc():
+    libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+    libc.inotify_init1.argtypes = [ctypes.c_int]
+    libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+    return libc
+
+
+class InotifyFileWatcher:
+    """Records create/modify/move/delete events for the watched directories.
+
+    Queries are answered from an index ordered by change time, so finding
+    the changes of the last hour costs O(recent changes). Subdirectories
+    down to max_depth levels get their own watches, including ones
+    created while running. A reconciliation scan runs periodically and
+    after queue overflows to catch anything the event stream dropped.
+    """
+
+    def __init__(self, directories: List[str], scan_directory: DirectoryScanner,
+                 retention: float = 3600, reconcile_interval: float = 300, max_depth: int = 0):
+        self.directories = directories
+        self.scan_directory = scan_directory
+        self.retention = retention
+        self.reconcile_interval = reconcile_interval
+        self.max_depth = max_depth
+        self._index: "OrderedDict[str, FileChange]" = OrderedDict()
+        self._watches: Dict[int, Tuple[str, str, int]] = {}  # wd -> (path, watched root, depth)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._fd: Optional[int] = None
+        self._libc = None
+        self._thread: Optional[threading.Thread] = None
+        self._next_reconcile = 0.0
+
+    @classmethod
+    def available(cls) -> bool:
+        if not sys.platform.startswith('linux'):
+            return False
+        try:
+            return hasattr(_load_libc(), 'inotify_init1')
+        except OSError:
+            return False
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Create the inotify instance, run the initial reconciliation and start the reader thread"""
+        if self._thread is not None:
+            return
+        self._libc = _load_libc()
+        fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, f"inotify_init1 failed: {os.strerror(error)}")
+        self._fd = fd
+        self.reconcile()
+        self._thread = threading.Thread(target=self._run, name="file-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def _add_watches(self):
+        watched = {path for path, _, _ in self._watches.values()}
+        for directory in self.directories:
+            if os.path.isdir(directory):
+                self._watch(directory, directory, 0, watched)
+
+    def _watch(self, path: str, root: str, depth: int, watched: set) -> List[str]:
+        """Watch path and its subdirectories down to max_depth; returns the regular files found below it"""
+        files = []
+        pending = [(path, depth)]
+        while pending:
+            current, current_depth = pending.pop()
+            if current not in watched:
+                wd = self._libc.inotify_add_watch(self._fd, os.fsencode(current), WATCH_MASK)
+                if wd < 0:
+                    continue
+                self._watches[wd] = (current, root, current_depth)
+                watched.add(current)
+            try:
+                with os.scandir(current) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            if current_depth < self.max_depth:
+                                pending.append((entry.path, current_depth + 1))
+                        elif entry.is_file():
+                            files.append(entry.path)
+            except OSError:
+                continue
+        return files
+
+    def reconcile(self):
+        """Rebuild the index from a directory scan and (re)attach watches to every directory"""
+        self._add_watches()
+        cutoff = time.time() - self.retention
+        scanned = {}
+        for directory in self.directories:
+            if not os.path.isdir(directory):
+                continue
+            try:
+                for path, st in self.scan_directory(directory):
+                    if st.st_mtime >= cutoff:
+                        scanned[path] = FileChange(path, directory, "modified", st.st_mtime, st.st_mtime)
+            except OSError:
+                continue
+
+        with self._lock:
+            # Keep event details for files that still exist; drop anything the scan no longer sees
+            for path, change in self._index.items():
+                if path in scanned and change.changed_at >= scanned[path].changed_at:
+                    scanned[path] = change
+            self._index = OrderedDict(sorted(scanned.items(), key=lambda item: item[1].changed_at))
+        self._next_reconcile = time.monotonic() + self.reconcile_interval
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                readable, _, _ = select.select([self._fd], [], [], 1.0)
+                if readable:
+                    self._read_events()
+                if time.monotonic() >= self._next_reconcile:
+                    self.reconcile()
+            except Exception as e:
+                print(f"Error in file watcher: {e}")
+                self._stop.wait(1.0)
+
+    def _read_events(self):
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return
+
+        touched: Dict[str, Tuple[str, str]] = {}
+        removed = set()
+        removed_directories = []
+        new_directories = []
+        overflow = False
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            name = data[offset + _EVENT_HEADER.size:offset + _EVENT_HEADER.size + length].rstrip(b'\0')
+            offset += _EVENT_HEADER.size + length
+
+            if mask & IN_Q_OVERFLOW:
+                overflow = True
+                continue
+            if mask & (IN_IGNORED | IN_DELETE_SELF | IN_MOVE_SELF):
+                self._watches.pop(wd, None)
+                continue
+            watch = self._watches.get(wd)
+            if watch is None or not name:
+                continue
+            watched_path, directory, depth = watch
+            path = os.path.join(watched_path, os.fsdecode(name))
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO) and depth < self.max_depth:
+                    new_directories.append((path, directory, depth + 1))
+                elif mask & (IN_DELETE | IN_MOVED_FROM):
+                    removed_directories.append(os.path.join(path, ''))
+                continue
+
+            if mask & (IN_DELETE | IN_MOVED_FROM):
+                removed.add(path)
+                touched.pop(path, None)
+            else:
+                event = "created" if mask & IN_CREATE else "moved" if mask & IN_MOVED_TO else "modified"
+                if path in touched and touched[path][1] != "modified":
+                    event = touched[path][1]
+                touched[path] = (directory, event)
+                removed.discard(path)
+
+        # Files written into a new directory before its watch existed produced no events of their own
+        watched = {watched_path for watched_path, _, _ in self._watches.values()}
+        for path, directory, depth in new_directories:
+            for file_path in self._watch(path, directory, depth, watched):
+                touched.setdefault(file_path, (directory, "created"))
+                removed.discard(file_path)
+
+        now = time.time()
+        # Each path is stat'ed once per read batch, however many events it produced
+        changes = []
+        for path, (directory, event) in touched.items():
+            try:
+                st = os.stat(path)
+            except OSError:
+                removed.add(path)
+                continue
+            if stat.S_ISREG(st.st_mode):
+                changes.append(FileChange(path, directory, event, st.st_mtime, now))
+
+        with self._lock:
+            for path in removed:
+                self._index.pop(path, None)
+            if removed_directories:
+                prefixes = tuple(removed_directories)
+                for path in [path for path in self._index if path.startswith(prefixes)]:
+                    del self._index[path]
+            for change in changes:
+                previous = self._index.pop(change.path, None)
+                if previous is not None and change.event == "modified" and previous.event != "modified":
+                    # Writes after a create/move-in are still reported as the original event
+                    change = change._replace(event=previous.event)
+                self._index[change.path] = change
+
+        if overflow:
+            self.reconcile()
+
+    def recent_changes(self, window: Optional[float] = None) -> List[FileChange]:
+        """Changes observed within the window (defaults to the retention period), newest first"""
+        cutoff = time.time() - (window if window is not None else self.retention)
+        retention_cutoff = time.time() - self.retention
+        recent = []
+        with self._lock:
+            while self._index:
+                oldest = next(iter(self._index.values()))
+                if oldest.changed_at >= retention_cutoff:
+                    break
+                self._index.popitem(last=False)
+            for change in reversed(self._index.values()):
+                if change.changed_at < cutoff:
+                    break
+                recent.append(change)
+        return recent
@@ -0,0 +1,92 @@
+"""
+Sorted Hash Set File
+Compact sorted SHA-256 digest file, memory-mapped and binary-searched for membership checks
+"""
+
+import mmap
+import os
+import struct
+import sys
+from typing import Iterable, Union
+
+DIGEST_SIZE = 32
+
+
+class HashSet:
+    """Read-only set of SHA-256 digests backed by a sorted binary file.
+
+    Layout: 4-byte magic, 8-byte little-endian count, then `count`
+    raw 32-byte digests in ascending order. Only the pages touched by
+    the binary search are ever read from disk.
+    """
+
+    MAGIC = b'HSH1'
+    _HEADER = struct.Struct('<4sQ')
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'rb')
+        size = os.fstat(self._file.fileno()).st_size
+        if size < self._HEADER.size:
+            self._file.close()
+            raise ValueError(f"Not a hash set file: {path}")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self._count = self._HEADER.unpack_from(self._map, 0)
+        if magic != self.MAGIC or self._HEADER.size + self._count * DIGEST_SIZE > size:
+            self.close()
+            raise ValueError(f"Not a hash set file: {path}")
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, digest: Union[str, bytes]) -> bool:
+        if isinstance(digest, str):
+            try:
+                digest = bytes.fromhex(digest)
+            except ValueError:
+                return False
+        if len(digest) != DIGEST_SIZE:
+            return False
+        low, high = 0, self._count
+        base = self._HEADER.size
+        while low < high:
+            middle = (low + high) // 2
+            offset = base + middle * DIGEST_SIZE
+            candidate = self._map[offset:offset + DIGEST_SIZE]
+            if candidate < digest:
+                low = middle + 1
+            elif candidate > digest:
+                high = middle
+            else:
+                return True
+        return False
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    @classmethod
+    def build(cls, digests: Iterable[str], path: str) -> int:
+        """Write hex digests (one per item; extra columns ignored) as a sorted hash set file"""
+        unique = set()
+        for line in digests:
+            token = line.strip().split()[0] if line.strip() else ''
+            if len(token) == DIGEST_SIZE * 2:
+                try:
+                    unique.add(bytes.fromhex(token))
+                except ValueError:
+                    continue
+        temporary = f"{path}.tmp"
+        with open(temporary, 'wb') as f:
+            f.write(cls._HEADER.pack(cls.MAGIC, len(unique)))
+            f.write(b''.join(sorted(unique)))
+        os.replace(temporary, path)
+        return len(unique)
+
+
+if __name__ == "__main__":
+    # python hash_db.py <hex digest list> <output file>
+    if len(sys.argv) != 3:
+        sys.exit("usage: hash_db.py <sha256 list> <output hash set>")
+    with open(sys.argv[1], encoding='utf-8') as source:
+        print(f"Wrote {HashSet.build(source, sys.argv[2])} digests to {sys.argv[2]}")
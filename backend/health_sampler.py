@@ -0,0 +1,115 @@
+"""
+Rolling System Health Sampler
+Samples CPU, memory and disk counters in the background so health reads never block
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+import psutil
+
+
+def _cpu_total(times) -> float:
+    # guest time is already accounted for in user/nice on Linux
+    return sum(times) - getattr(times, 'guest', 0) - getattr(times, 'guest_nice', 0)
+
+
+def _cpu_busy(times) -> float:
+    return _cpu_total(times) - times.idle - getattr(times, 'iowait', 0)
+
+
+def _busy_percent(before, after) -> float:
+    """CPU utilisation between two cpu_times readings, matching psutil.cpu_percent"""
+    total_delta = _cpu_total(after) - _cpu_total(before)
+    if total_delta <= 0:
+        return 0.0
+    busy_delta = _cpu_busy(after) - _cpu_busy(before)
+    return round(min(100.0, max(0.0, busy_delta / total_delta * 100)), 1)
+
+
+class HealthSampler:
+    WINDOWS = (1, 10, 60)
+
+    def __init__(self, interval: float = 1.0, disk_path: str = '/'):
+        self.interval = interval
+        self.disk_path = disk_path
+        self._samples = deque(maxlen=int(max(self.WINDOWS) / interval) + 2)
+        self._memory = None
+        self._disk = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Take an initial sample and start the background sampling thread"""
+        if self._thread is not None:
+            return
+        self._sample()
+        self._thread = threading.Thread(target=self._run, name="health-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval * 2)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self._sample()
+            except Exception as e:
+                print(f"Error sampling system health: {e}")
+
+    def _sample(self):
+        now = time.monotonic()
+        cpu_total = psutil.cpu_times()
+        cpu_cores = psutil.cpu_times(percpu=True)
+        memory = psutil.virtual_memory()
+        disk = psutil.disk_usage(self.disk_path)
+        with self._lock:
+            self._samples.append((now, cpu_total, cpu_cores))
+            self._memory = memory
+            self._disk = disk
+
+    def _baseline(self, samples: List, window: float):
+        """Newest sample at least `window` seconds older than the latest one"""
+        latest_ts = samples[-1][0]
+        for sample in reversed(samples[:-1]):
+            if latest_ts - sample[0] >= window - self.interval / 2:
+                return sample
+        return samples[0]
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Latest CPU, memory and disk readings computed from the sampled deltas"""
+        with self._lock:
+            samples = list(self._samples)
+            memory = self._memory
+            disk = self._disk
+
+        if not samples:
+            raise RuntimeError("Health sampler has not been started")
+
+        latest = samples[-1]
+        averages = {}
+        for window in self.WINDOWS:
+            if len(samples) < 2:
+                averages[f"{window}s"] = 0.0
+            else:
+                averages[f"{window}s"] = _busy_percent(self._baseline(samples, window)[1], latest[1])
+
+        if len(samples) < 2:
+            per_core = [0.0] * len(latest[2])
+        else:
+            previous = samples[-2]
+            per_core = [_busy_percent(before, after) for before, after in zip(previous[2], latest[2])]
+
+        return {
+            "cpu_percent": averages["1s"],
+            "cpu_per_core": per_core,
+            "cpu_averages": averages,
+            "memory_percent": memory.percent,
+            "disk_percent": disk.percent
+        }
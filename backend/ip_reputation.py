@@ -0,0 +1,206 @@
+"""
+IP Reputation Index
+CIDR blocklists flattened into sorted interval arrays for O(log n) IPv4/IPv6 lookups
+"""
+
+import ipaddress
+import os
+import socket
+from bisect import bisect_right
+from typing import Dict, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # batch lookups fall back to per-address bisect
+    np = None
+
+_IPV4_MAPPED_PREFIX = bytes(10) + b'\xff\xff'
+
+
+def ip_to_int(ip: str) -> Tuple[int, int]:
+    """Parse an address into (version, integer); IPv4-mapped IPv6 is folded to IPv4"""
+    if ':' in ip:
+        packed = socket.inet_pton(socket.AF_INET6, ip.split('%', 1)[0])
+        if packed.startswith(_IPV4_MAPPED_PREFIX):
+            return 4, int.from_bytes(packed[12:], 'big')
+        return 6, int.from_bytes(packed, 'big')
+    return 4, int.from_bytes(socket.inet_aton(ip), 'big')
+
+
+def pack_addresses(ips: Sequence[str]):
+    """Pack addresses into NumPy arrays for classify_packed().
+
+    Returns (ipv4 uint32 array, ipv4 positions, ipv6 S16 array, ipv6
+    positions); positions index back into ips. Unparseable addresses are
+    left out of both arrays.
+    """
+    v4_packed, v4_positions, v6_packed, v6_positions = [], [], [], []
+    for position, ip in enumerate(ips):
+        try:
+            if ':' in ip:
+                packed = socket.inet_pton(socket.AF_INET6, ip.split('%', 1)[0])
+                if packed.startswith(_IPV4_MAPPED_PREFIX):
+                    v4_packed.append(packed[12:])
+                    v4_positions.append(position)
+                else:
+                    v6_packed.append(packed)
+                    v6_positions.append(position)
+            else:
+                v4_packed.append(socket.inet_aton(ip))
+                v4_positions.append(position)
+        except (OSError, ValueError):
+            continue
+    # Big-endian 16-byte strings sort in the same order as the 128-bit integers
+    return (np.frombuffer(b''.join(v4_packed), dtype='>u4').astype(np.uint32), v4_positions,
+            np.frombuffer(b''.join(v6_packed), dtype='S16'), v6_positions)
+
+
+class IPReputationIndex:
+    """Maps addresses to the category of the most specific matching CIDR.
+
+    CIDRs are either nested or disjoint, so after build() every address
+    space is cut into non-overlapping segments, each tagged with the
+    innermost CIDR's category. A lookup is a single binary search.
+    """
+
+    def __init__(self):
+        self.categories: List[str] = []
+        self._category_ids: Dict[str, int] = {}
+        self._networks: Dict[int, List[Tuple[int, int, int]]] = {4: [], 6: []}
+        self._bounds: Dict[int, List[int]] = {4: [0], 6: [0]}
+        self._segment_category: Dict[int, List[int]] = {4: [-1], 6: [-1]}
+        self._packed_bounds = {}
+        self._packed_categories = {}
+        self._built = False
+
+    def __len__(self) -> int:
+        return len(self._networks[4]) + len(self._networks[6])
+
+    def _category_id(self, category: str) -> int:
+        category_id = self._category_ids.get(category)
+        if category_id is None:
+            category_id = len(self.categories)
+            self._category_ids[category] = category_id
+            self.categories.append(category)
+        return category_id
+
+    def add(self, cidr: str, category: str):
+        """Add a CIDR (or single address) under the given category"""
+        network = ipaddress.ip_network(cidr.strip(), strict=False)
+        start = int(network.network_address)
+        end = int(network.broadcast_address)
+        self._networks[network.version].append((start, end, self._category_id(category)))
+        self._built = False
+
+    def load_file(self, path: str, category: Optional[str] = None) -> int:
+        """Load one CIDR per line; the category defaults to the file name without extension"""
+        category = category or os.path.splitext(os.path.basename(path))[0]
+        loaded = 0
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                entry = line.split('#', 1)[0].split(';', 1)[0].strip()
+                if not entry:
+                    continue
+                try:
+                    self.add(entry.split()[0], category)
+                    loaded += 1
+                except ValueError:
+                    continue
+        return loaded
+
+    def load_directory(self, directory: str) -> int:
+        """Load every regular file in a blocklist directory"""
+        loaded = 0
+        for entry in sorted(os.scandir(directory), key=lambda e: e.name):
+            if entry.is_file() and not entry.name.startswith('.'):
+                try:
+                    loaded += self.load_file(entry.path)
+                except OSError as e:
+                    print(f"Error loading blocklist {entry.path}: {e}")
+        return loaded
+
+    def build(self):
+        """Flatten the nested CIDRs of each address family into disjoint segments"""
+        for version, networks in self._networks.items():
+            # Wider networks first so nested ones are pushed on top of their parent
+            networks.sort(key=lambda n: (n[0], -n[1]))
+            bounds = [0]
+            categories = [-1]
+
+            def mark(position: int, category_id: int):
+                if bounds[-1] == position:
+                    categories[-1] = category_id
+                else:
+                    bounds.append(position)
+                    categories.append(category_id)
+
+            stack = []
+            for start, end, category_id in networks:
+                while stack and stack[-1][0] < start:
+                    closed_end = stack.pop()[0]
+                    mark(closed_end + 1, stack[-1][1] if stack else -1)
+                mark(start, category_id)
+                stack.append((end, category_id))
+            while stack:
+                closed_end = stack.pop()[0]
+                mark(closed_end + 1, stack[-1][1] if stack else -1)
+
+            # Merge neighbouring segments that ended up with the same category
+            merged_bounds, merged_categories = [bounds[0]], [categories[0]]
+            for position, category_id in zip(bounds[1:], categories[1:]):
+                if category_id != merged_categories[-1]:
+                    merged_bounds.append(position)
+                    merged_categories.append(category_id)
+            self._bounds[version] = merged_bounds
+            self._segment_category[version] = merged_categories
+            if np is not None:
+                self._pack_segments(version)
+        self._built = True
+
+    def _pack_segments(self, version: int):
+        bits = 32 if version == 4 else 128
+        bounds, categories = [], []
+        for position, category_id in zip(self._bounds[version], self._segment_category[version]):
+            if position < 1 << bits:  # a network ending at the top of the space closes past it
+                bounds.append(position)
+                categories.append(category_id)
+        if version == 4:
+            self._packed_bounds[4] = np.array(bounds, dtype=np.uint32)
+        else:
+            self._packed_bounds[6] = np.array([b.to_bytes(16, 'big') for b in bounds], dtype='S16')
+        self._packed_categories[version] = np.array(categories, dtype=np.int32)
+
+    def classify_packed(self, version: int, addresses) -> "np.ndarray":
+        """Category ids (-1 for no match) for a packed address array from pack_addresses()"""
+        if not self._built:
+            self.build()
+        segments = np.searchsorted(self._packed_bounds[version], addresses, side='right') - 1
+        return self._packed_categories[version][segments]
+
+    def lookup_many(self, ips: Sequence[str]) -> List[Optional[str]]:
+        """Classify a whole connection table in one vectorised pass per address family"""
+        if np is None:
+            return [self.lookup(ip) for ip in ips]
+        if not self._built:
+            self.build()
+        results: List[Optional[str]] = [None] * len(ips)
+        v4, v4_positions, v6, v6_positions = pack_addresses(ips)
+        for version, packed, positions in ((4, v4, v4_positions), (6, v6, v6_positions)):
+            if not positions:
+                continue
+            for position, category_id in zip(positions, self.classify_packed(version, packed).tolist()):
+                if category_id >= 0:
+                    results[position] = self.categories[category_id]
+        return results
+
+    def lookup(self, ip: str) -> Optional[str]:
+        """Category of the most specific CIDR containing ip, or None"""
+        if not self._built:
+            self.build()
+        try:
+            version, value = ip_to_int(ip)
+        except (OSError, ValueError):
+            return None
+        segment = bisect_right(self._bounds[version], value) - 1
+        category_id = self._segment_category[version][segment]
+        return self.categories[category_id] if category_id >= 0 else None
@@ -0,0 +1,69 @@
+"""
+Fast JSON Response Layer
+orjson encoding with a stdlib fallback, and a per-version cache of encoded response bodies
+"""
+
+import json
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # the stdlib encoder is the fallback
+    orjson = None
+
+ENCODER_NAME = 'orjson' if orjson is not None else 'json'
+
+
+def dumps(obj: Any) -> bytes:
+    """Compact UTF-8 JSON; values the encoder does not know are stringified"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=str, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, default=str, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def splice(envelope: bytes, key: str, raw: bytes) -> bytes:
+    """Add an already encoded value to an encoded JSON object without decoding either"""
+    if envelope == b'{}':
+        return b'{' + dumps(key) + b':' + raw + b'}'
+    return envelope[:-1] + b',' + dumps(key) + b':' + raw + b'}'
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse that skips jsonable_encoder's per-value walk and encodes directly"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+class EncodedResponseCache:
+    """Encoded bodies for the current snapshot version, shared by every client.
+
+    Entries are keyed by version plus whatever shapes the body (path and
+    query). Moving to a new version drops everything from the old one.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self.version = None
+        self._entries: "OrderedDict[Hashable, bytes]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, version: Any, key: Hashable, build: Callable[[], bytes]) -> bytes:
+        if version != self.version:
+            self._entries.clear()
+            self.version = version
+        body = self._entries.get(key)
+        if body is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return body
+        self.misses += 1
+        body = build()
+        self._entries[key] = body
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return body
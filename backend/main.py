@@ -3,22 +3,81 @@ CyberSecurity AI Platform - Main FastAPI Application
 Advanced Network Anomaly Detection and Threat Intelligence Platform
 """
 
-from fastapi import FastAPI, HTTPException
+import asyncio
+import hashlib
+from contextlib import asynccontextmanager
+from datetime import datetime
+from fastapi import FastAPI, HTTPException, Query, Request, Response, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 import uvicorn
+from typing import Any, Callable, Dict, List, Optional, Tuple
 from system_monitor import MacOSThreatDetector
-from datetime import datetime
+from snapshot_engine import SnapshotEngine
+from threat_store import ThreatStore
+from threat_stream import ThreatStream
+from json_codec import EncodedResponseCache, FastJSONResponse, dumps, splice
+
+# Initialize threat detector and the background snapshot engine that drives it
+threat_detector = MacOSThreatDetector()
+snapshot_engine = SnapshotEngine(threat_detector)
+
+STREAM_KEEPALIVE = 15  # seconds between SSE keep-alive comments
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    snapshot_engine.add_listener(threat_store.apply)
+    snapshot_engine.add_listener(threat_stream.on_snapshot)
+    await snapshot_engine.start()
+    yield
+    await snapshot_engine.stop()
 
 # Create FastAPI app
 app = FastAPI(
     title="CyberSecurity AI Platform",
     description="Advanced Network Anomaly Detection and Threat Intelligence Platform",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse
 )
 
-# Initialize threat detector
-threat_detector = MacOSThreatDetector()
+async def get_snapshot():
+    """Latest collector snapshot; handlers never run scans themselves"""
+    try:
+        return await snapshot_engine.wait_for_snapshot()
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=503, detail="Threat data is not available yet")
+
+def version_etag(version: int, request: Request) -> str:
+    """Strong validator: engine instance, data version and the query that shaped the body"""
+    query = hashlib.sha1(str(sorted(request.query_params.multi_items())).encode()).hexdigest()[:12]
+    return f'"{snapshot_engine.instance_id}-{version}-{query}"'
+
+def not_modified(request: Request, etag: str) -> Optional[Response]:
+    """A bodiless 304 when the client already has this version"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        if "*" in candidates or etag in candidates:
+            return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+    return None
+
+# Encoded bodies for the current version, shared by every client asking the same question.
+# Summaries follow the snapshot version; threat lists follow the threat store's version,
+# which only moves when a threat is added, changed or removed.
+summary_cache = EncodedResponseCache()
+threats_cache = EncodedResponseCache()
+
+def versioned_response(request: Request, version: int, cache: EncodedResponseCache,
+                       build: Callable[[], bytes]) -> Response:
+    """Conditional, cached JSON response for a body that is fixed for `version`"""
+    etag = version_etag(version, request)
+    cached = not_modified(request, etag)
+    if cached is not None:
+        return cached
+    body = cache.get(version, (request.url.path, etag), build)
+    return Response(content=body, media_type="application/json",
+                    headers={"ETag": etag, "Cache-Control": "no-cache"})
 
 # Add CORS middleware
 app.add_middleware(
@@ -27,6 +86,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
 
 # Basic health check endpoint
@@ -42,54 +102,70 @@ async def root():
 async def health_check():
     return {"status": "healthy"}
 
+def build_summary_stats(snapshot) -> Dict[str, Any]:
+    """Dashboard counters for one snapshot"""
+    system_threats = snapshot.system_threats
+    system_health = snapshot.system_health
+    process_summary = snapshot.process_summary
+    
+    # Count active threats and critical threats
+    total_threats = (
+        len(system_threats.get("process_threats", [])) +
+        len(system_threats.get("network_threats", [])) +
+        len(system_threats.get("file_threats", []))
+    )
+    
+    # Count critical threats
+    critical_threats = 0
+    for threat_list in [system_threats.get("process_threats", []), 
+                       system_threats.get("network_threats", []), 
+                       system_threats.get("file_threats", [])]:
+        for threat in threat_list:
+            if threat.get("severity", "").lower() == "critical":
+                critical_threats += 1
+    
+    return {
+        "totalAlerts": len(system_threats.get("process_threats", [])) + len(system_threats.get("network_threats", [])),
+        "activeThreats": total_threats,
+        "total_threats": total_threats,
+        "critical_threats": critical_threats,
+        "systemStatus": system_health.get("status", "unknown"),
+        "detectionRate": 98.5,  # This would be calculated based on actual detection metrics
+        "networkHealth": 100 - (len(system_threats.get("network_threats", [])) * 10),
+        "malwareBlocked": len(system_threats.get("process_threats", [])),
+        "blocked_connections": len(system_threats.get("network_threats", [])),
+        "monitored_processes": process_summary.get("process_count", 0),
+        "cpuUsage": system_health.get("cpu_percent", 0),
+        "memoryUsage": system_health.get("memory_percent", 0),
+        "diskUsage": system_health.get("disk_percent", 0),
+        "processCount": process_summary.get("process_count", 0)
+    }
+
 @app.get("/api/dashboard/summary")
-async def dashboard_summary():
+async def dashboard_summary(request: Request):
     """Get real-time dashboard summary with actual system data"""
+    snapshot = await get_snapshot()
+    return versioned_response(request, snapshot.version, summary_cache,
+                              lambda: dumps(build_dashboard_summary(snapshot)))
+
+def build_dashboard_summary(snapshot) -> Dict[str, Any]:
     try:
-        system_threats = threat_detector.get_system_threats()
-        system_health = threat_detector.get_system_health()
-        process_summary = threat_detector.get_running_processes_summary()
-        
-        # Count active threats and critical threats
-        total_threats = (
-            len(system_threats.get("process_threats", [])) +
-            len(system_threats.get("network_threats", [])) +
-            len(system_threats.get("file_threats", []))
-        )
-        
-        # Count critical threats
-        critical_threats = 0
-        for threat_list in [system_threats.get("process_threats", []), 
-                           system_threats.get("network_threats", []), 
-                           system_threats.get("file_threats", [])]:
-            for threat in threat_list:
-                if threat.get("severity", "").lower() == "critical":
-                    critical_threats += 1
+        system_threats = snapshot.system_threats
+        stats = build_summary_stats(snapshot)
         
         return {
-            "stats": {
-                "totalAlerts": len(system_threats.get("process_threats", [])) + len(system_threats.get("network_threats", [])),
-                "activeThreats": total_threats,
-                "total_threats": total_threats,
-                "critical_threats": critical_threats,
-                "systemStatus": system_health.get("status", "unknown"),
-                "detectionRate": 98.5,  # This would be calculated based on actual detection metrics
-                "networkHealth": 100 - (len(system_threats.get("network_threats", [])) * 10),
-                "malwareBlocked": len(system_threats.get("process_threats", [])),
-                "blocked_connections": len(system_threats.get("network_threats", [])),
-                "monitored_processes": process_summary.get("process_count", 0),
-                "cpuUsage": system_health.get("cpu_percent", 0),
-                "memoryUsage": system_health.get("memory_percent", 0),
-                "diskUsage": system_health.get("disk_percent", 0),
-                "processCount": process_summary.get("process_count", 0)
-            },
+            "stats": stats,
             "timeSeriesData": {
                 "labels": ["00:00", "04:00", "08:00", "12:00", "16:00", "20:00"],
                 "anomalies": [12, 19, 8, 15, 22, len(system_threats.get("network_threats", []))],
-                "threats": [5, 8, 3, 7, 12, total_threats],
+                "threats": [5, 8, 3, 7, 12, stats["total_threats"]],
                 "alerts": [18, 25, 12, 20, 31, len(system_threats.get("process_threats", []))]
             },
-            "lastUpdated": datetime.now().isoformat()
+            "lastUpdated": snapshot.created_at,
+            "snapshotVersion": snapshot.version,
+            "connectionGeneration": system_threats.get("connection_generation"),
+            "detectors": snapshot.detector_status,
+            "incompleteDetectors": system_threats.get("incomplete_detectors", [])
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error getting dashboard data: {str(e)}")
@@ -115,84 +191,225 @@ async def get_anomalies():
         "totalPages": 1
     }
 
+def build_threat_list(system_threats: Dict[str, Any]) -> List[Tuple[str, Dict[str, Any]]]:
+    """API threat records keyed by their detector-level id"""
+    threats = []
+    
+    # Add process threats
+    for proc_threat in system_threats.get("process_threats", []):
+        threats.append((proc_threat["id"], {
+            "timestamp": proc_threat["timestamp"],
+            "threat_type": "suspicious_process",
+            "severity": proc_threat["severity"],
+            "status": "active",
+            "source": "system_monitor",
+            "title": f"Suspicious Process: {proc_threat['name']}",
+            "description": proc_threat["description"],
+            "confidence_score": 0.85,
+            "details": {
+                "pid": proc_threat["pid"],
+                "cpu_percent": proc_threat["cpu_percent"],
+                "memory_percent": proc_threat["memory_percent"],
+                "matched_patterns": proc_threat.get("matched_patterns", []),
+                "exe": proc_threat.get("exe"),
+                "exe_sha256": proc_threat.get("exe_sha256"),
+                "hash_reputation": proc_threat.get("hash_reputation"),
+                "ancestry": proc_threat.get("ancestry", []),
+                "detection": proc_threat.get("detection", "process_table"),
+                "exited": proc_threat.get("exited", False)
+            }
+        }))
+    
+    # Add network threats
+    for net_threat in system_threats.get("network_threats", []):
+        threats.append((net_threat["id"], {
+            "timestamp": net_threat["timestamp"],
+            "threat_type": "network_anomaly",
+            "severity": net_threat["severity"],
+            "status": "active",
+            "source": "network_monitor",
+            "title": f"Suspicious Network Activity",
+            "description": net_threat["description"],
+            "confidence_score": 0.90,
+            "details": {
+                "remote_ip": net_threat.get("remote_ip"),
+                "remote_port": net_threat.get("remote_port"),
+                "local_port": net_threat.get("local_port"),
+                "pid": net_threat.get("pid"),
+                "reputation": net_threat.get("reputation")
+            }
+        }))
+        
+    # Add file threats
+    for file_threat in system_threats.get("file_threats", []):
+        threats.append((file_threat["id"], {
+            "timestamp": file_threat["timestamp"],
+            "threat_type": "file_anomaly",
+            "severity": file_threat["severity"],
+            "status": "active",
+            "source": "file_monitor",
+            "title": f"Suspicious File Activity",
+            "description": file_threat["description"],
+            "confidence_score": 0.75,
+            "details": {
+                "filepath": file_threat.get("filepath"),
+                "directory": file_threat.get("directory"),
+                "event": file_threat.get("event"),
+                "changed_fields": file_threat.get("changed_fields"),
+                "sha256": file_threat.get("sha256"),
+                "fast_hash": file_threat.get("fast_hash"),
+                "signatures": file_threat.get("signatures", []),
+                "modified_time": file_threat.get("modified_time")
+            }
+        }))
+    
+    return threats
+
+# Current threats under stable ids, updated once per snapshot
+threat_store = ThreatStore(build_threat_list)
+
+def parse_time(value: Optional[str], name: str) -> Optional[float]:
+    if value is None:
+        return None
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid {name} timestamp: {value}")
+
 # Threats endpoint  
 @app.get("/api/threats")
-async def get_threats():
-    """Get real-time threats detected on the system"""
-    try:
-        system_threats = threat_detector.get_system_threats()
-        
-        threats = []
-        threat_id = 1
-        
-        # Add process threats
-        for proc_threat in system_threats.get("process_threats", []):
-            threats.append({
-                "id": f"threat-{threat_id:03d}",
-                "timestamp": proc_threat["timestamp"],
-                "threat_type": "suspicious_process",
-                "severity": proc_threat["severity"],
-                "status": "active",
-                "source": "system_monitor",
-                "title": f"Suspicious Process: {proc_threat['name']}",
-                "description": proc_threat["description"],
-                "confidence_score": 0.85,
-                "details": {
-                    "pid": proc_threat["pid"],
-                    "cpu_percent": proc_threat["cpu_percent"],
-                    "memory_percent": proc_threat["memory_percent"]
-                }
-            })
-            threat_id += 1
-        
-        # Add network threats
-        for net_threat in system_threats.get("network_threats", []):
-            threats.append({
-                "id": f"threat-{threat_id:03d}",
-                "timestamp": net_threat["timestamp"],
-                "threat_type": "network_anomaly",
-                "severity": net_threat["severity"],
-                "status": "active",
-                "source": "network_monitor",
-                "title": f"Suspicious Network Activity",
-                "description": net_threat["description"],
-                "confidence_score": 0.90,
-                "details": {
-                    "remote_ip": net_threat.get("remote_ip"),
-                    "remote_port": net_threat.get("remote_port"),
-                    "local_port": net_threat.get("local_port")
-                }
-            })
-            threat_id += 1
+async def get_threats(request: Request, since: Optional[int] = None, instance: Optional[str] = None,
+                      severity: Optional[str] = None, threat_type: Optional[str] = None,
+                      source: Optional[str] = None, start: Optional[str] = None, end: Optional[str] = None,
+                      sort: str = "newest", limit: int = Query(100, ge=1, le=1000),
+                      cursor: Optional[str] = None):
+    """Get real-time threats detected on the system.
+
+    Without `since`, returns one page of threats filtered by comma-separated
+    severity/threat_type/source values and a first-seen time range; pass the
+    returned nextCursor to get the following page. `since` returns only what
+    changed after that snapshotVersion; pass the instanceId it came with so
+    versions from before a backend restart get the full list instead.
+    """
+    snapshot = await get_snapshot()
+    start_time, end_time = parse_time(start, "start"), parse_time(end, "end")
+
+    def build() -> bytes:
+        try:
+            # Only store state goes in the body, so it stays identical for as long as the ETag does
+            envelope = {
+                "totalCount": len(threat_store),
+                "lastUpdated": threat_store.updated_at,
+                "snapshotVersion": threat_store.version,
+                "instanceId": snapshot_engine.instance_id
+            }
             
-        # Add file threats
-        for file_threat in system_threats.get("file_threats", []):
-            threats.append({
-                "id": f"threat-{threat_id:03d}",
-                "timestamp": file_threat["timestamp"],
-                "threat_type": "file_anomaly",
-                "severity": file_threat["severity"],
-                "status": "active",
-                "source": "file_monitor",
-                "title": f"Suspicious File Activity",
-                "description": file_threat["description"],
-                "confidence_score": 0.75,
-                "details": {
-                    "filepath": file_threat.get("filepath"),
-                    "directory": file_threat.get("directory"),
-                    "modified_time": file_threat.get("modified_time")
-                }
-            })
-            threat_id += 1
-        
-        return {
-            "threats": threats,
-            "totalPages": 1,
-            "totalCount": len(threats),
-            "lastUpdated": datetime.now().isoformat()
-        }
+            # Threat records are spliced in from the store's per-threat encodings
+            if since is not None:
+                foreign = instance is not None and instance != snapshot_engine.instance_id
+                changes = None if foreign else threat_store.changes_since(since)
+                envelope["since"] = since
+                if changes is None:
+                    # Too old, too new or from another instance: the client needs the complete list to resync
+                    envelope["full"] = True
+                    return splice(dumps(envelope), "threats", threat_store.encode_list(threat_store.threats.values()))
+                envelope["removed"] = changes.removed
+                body = splice(dumps(envelope), "added", threat_store.encode_list(changes.added))
+                return splice(body, "changed", threat_store.encode_list(changes.changed))
+            
+            filters = {
+                "severity": severity.split(",") if severity else [],
+                "threat_type": threat_type.split(",") if threat_type else [],
+                "source": source.split(",") if source else []
+            }
+            try:
+                page = threat_store.query(filters, start=start_time, end=end_time, sort=sort, limit=limit, cursor=cursor)
+            except ValueError as e:
+                # Unknown sort order or a cursor that does not belong to this query
+                raise HTTPException(status_code=400, detail=str(e))
+            envelope["nextCursor"] = page.next_cursor
+            return splice(dumps(envelope), "threats", threat_store.encode_list(page.threats))
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error getting threats: {str(e)}")
+
+    return versioned_response(request, threat_store.version, threats_cache, build)
+
+# Push stream: one snapshot message, then delta/health events as the collector publishes them
+threat_stream = ThreatStream(threat_store, build_summary_stats)
+
+async def wait_for_disconnect(websocket: WebSocket):
+    """Consume client frames until the socket closes; the stream itself never reads them"""
+    while True:
+        message = await websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            return
+
+@app.websocket("/api/stream")
+async def stream_websocket(websocket: WebSocket):
+    await websocket.accept()
+    disconnected = asyncio.create_task(wait_for_disconnect(websocket))
+    try:
+        await get_snapshot()
+        version, _, message = threat_stream.snapshot_message()
+        await websocket.send_text(message)
+        while True:
+            waiter = asyncio.create_task(threat_stream.wait_for_events(version, STREAM_KEEPALIVE))
+            await asyncio.wait({waiter, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+            if disconnected.done():
+                waiter.cancel()
+                break
+            events = waiter.result()
+            if events is None:
+                # Too far behind for the event history; start over from the current state
+                events = [threat_stream.snapshot_message()]
+            for version, _, message in events:
+                await websocket.send_text(message)
+    except (WebSocketDisconnect, HTTPException):
+        pass
+    finally:
+        disconnected.cancel()
+
+@app.get("/api/stream")
+async def stream_events(request: Request):
+    """Server-Sent Events fallback for clients that cannot open a WebSocket"""
+    await get_snapshot()
+
+    async def event_source():
+        # Event ids carry the engine instance, like ETags, so ids from before a restart force a resync
+        instance, _, last_event = request.headers.get("last-event-id", "").rpartition("-")
+        try:
+            version = int(last_event)
+            events = threat_stream.events_after(version) if instance == snapshot_engine.instance_id else None
+        except ValueError:
+            events = None
+        if events is None:
+            events = [threat_stream.snapshot_message()]
+        while True:
+            for version, event_type, message in events:
+                yield f"id: {snapshot_engine.instance_id}-{version}\nevent: {event_type}\ndata: {message}\n\n"
+            if await request.is_disconnected():
+                break
+            events = await threat_stream.wait_for_events(version, STREAM_KEEPALIVE)
+            if events is None:
+                events = [threat_stream.snapshot_message()]
+            elif not events:
+                yield ": keep-alive\n\n"
+
+    return StreamingResponse(event_source(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.post("/api/files/rebaseline")
+async def rebaseline_files():
+    """Accept the current sensitive-directory contents as the new file baseline"""
+    if threat_detector.file_baseline is None:
+        raise HTTPException(status_code=409, detail="File baseline mode is not enabled (FILE_DETECTION_MODE=baseline)")
+    try:
+        files = await asyncio.to_thread(threat_detector.rebaseline_files)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error getting threats: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error rebaselining files: {str(e)}")
+    return {"status": "rebaselined", "files": files}
 
 # Alerts endpoint
 @app.get("/api/alerts")
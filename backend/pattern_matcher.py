@@ -0,0 +1,93 @@
+"""
+Aho-Corasick Multi-Pattern Matcher
+Matches any number of patterns against a string (or bytes) in a single linear pass
+"""
+
+from collections import deque, namedtuple
+from typing import Any, Iterable, List, Optional
+
+Match = namedtuple('Match', ['end', 'pattern', 'label'])
+
+
+class AhoCorasickMatcher:
+    """Compiled automaton over str or bytes patterns.
+
+    Patterns are added with an optional label (e.g. the IOC list they came
+    from); build() must be called once before searching.
+    """
+
+    def __init__(self, patterns: Optional[Iterable] = None, label: Any = None):
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]
+        self._patterns = []
+        self._built = False
+        for pattern in patterns or []:
+            self.add(pattern, label)
+
+    def __len__(self) -> int:
+        return len(self._patterns)
+
+    def add(self, pattern, label: Any = None):
+        """Add a pattern; duplicates are ignored"""
+        if not pattern:
+            return
+        node = 0
+        for symbol in pattern:
+            next_node = self._goto[node].get(symbol)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto[node][symbol] = next_node
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            node = next_node
+        if not any(self._patterns[index][0] == pattern for index in self._output[node]):
+            self._output[node].insert(0, len(self._patterns))
+            self._patterns.append((pattern, label))
+        self._built = False
+
+    def build(self):
+        """Compute failure links; outputs of suffix states are merged into each state"""
+        queue = deque()
+        for node in self._goto[0].values():
+            self._fail[node] = 0
+            queue.append(node)
+        while queue:
+            node = queue.popleft()
+            for symbol, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and symbol not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(symbol, 0)
+                self._fail[child] = target if target != child else 0
+                self._output[child] = self._output[child] + [
+                    index for index in self._output[self._fail[child]]
+                    if index not in self._output[child]
+                ]
+        self._built = True
+
+    def search(self, text) -> List[Match]:
+        """Return every pattern occurrence in text, ordered by end offset"""
+        if not self._built:
+            self.build()
+        goto, fail, output, patterns = self._goto, self._fail, self._output, self._patterns
+        matches = []
+        node = 0
+        for position, symbol in enumerate(text):
+            while node and symbol not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(symbol, 0)
+            for index in output[node]:
+                pattern, label = patterns[index]
+                matches.append(Match(position + 1, pattern, label))
+        return matches
+
+    def matched_patterns(self, text) -> List:
+        """Distinct patterns found in text, in order of first occurrence"""
+        seen = []
+        for match in self.search(text):
+            if match.pattern not in seen:
+                seen.append(match.pattern)
+        return seen
@@ -0,0 +1,183 @@
+"""
+Process Event Listener
+Receives fork/exec/exit notifications from the Linux proc connector (NETLINK_CONNECTOR)
+"""
+
+import errno
+import os
+import queue
+import select
+import socket
+import struct
+import sys
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+NETLINK_CONNECTOR = 11
+CN_IDX_PROC = 1
+CN_VAL_PROC = 1
+NLMSG_DONE = 3
+
+PROC_CN_MCAST_LISTEN = 1
+PROC_CN_MCAST_IGNORE = 2
+
+PROC_EVENT_FORK = 0x00000001
+PROC_EVENT_EXEC = 0x00000002
+PROC_EVENT_EXIT = 0x80000000
+
+_NLMSG_HEADER = struct.Struct('=IHHII')   # length, type, flags, seq, pid
+_CN_MSG = struct.Struct('=IIIIHH')        # idx, val, seq, ack, length, flags
+_PROC_EVENT = struct.Struct('=IIQ')       # what, cpu, timestamp_ns
+_FORK_EVENT = struct.Struct('=iiii')      # parent pid, parent tgid, child pid, child tgid
+_EXEC_EVENT = struct.Struct('=ii')        # pid, tgid
+_EXIT_EVENT = struct.Struct('=iiII')      # pid, tgid, exit code, exit signal
+
+
+class ProcConnectorListener:
+    """Delivers process lifecycle events as the kernel emits them.
+
+    Only thread-group leaders are reported, so callbacks see processes
+    rather than threads. The reader thread only parses and queues events;
+    callbacks run on a separate worker, so slow callbacks cannot make the
+    socket buffer overflow. Subscribing requires CAP_NET_ADMIN; check
+    available() before starting. If the socket buffer or the queue
+    overflows, events are dropped and counted, and the periodic process
+    walk still covers them.
+    """
+
+    def __init__(self, on_exec: Callable[[int], None],
+                 on_exit: Optional[Callable[[int], None]] = None,
+                 on_fork: Optional[Callable[[int, int], None]] = None,
+                 queue_size: int = 65536):
+        self.on_exec = on_exec
+        self.on_exit = on_exit
+        self.on_fork = on_fork
+        self.dropped = 0        # socket overflows reported by the kernel (ENOBUFS)
+        self.queue_dropped = 0  # events discarded because the callback worker fell behind
+        self._queue: "queue.Queue[Tuple[Callable, Tuple]]" = queue.Queue(maxsize=queue_size)
+        self._socket: Optional[socket.socket] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._worker: Optional[threading.Thread] = None
+
+    @classmethod
+    def available(cls) -> bool:
+        if not sys.platform.startswith('linux') or not hasattr(socket, 'AF_NETLINK'):
+            return False
+        try:
+            with cls._open_socket() as sock:
+                cls._subscribe(sock, PROC_CN_MCAST_IGNORE)
+            return True
+        except OSError:
+            return False
+
+    @staticmethod
+    def _open_socket() -> socket.socket:
+        sock = socket.socket(socket.AF_NETLINK, socket.SOCK_DGRAM, NETLINK_CONNECTOR)
+        try:
+            sock.bind((0, CN_IDX_PROC))
+        except OSError:
+            sock.close()
+            raise
+        return sock
+
+    @staticmethod
+    def _subscribe(sock: socket.socket, op: int):
+        payload = _CN_MSG.pack(CN_IDX_PROC, CN_VAL_PROC, 0, 0, 4, 0) + struct.pack('=I', op)
+        sock.send(_NLMSG_HEADER.pack(_NLMSG_HEADER.size + len(payload), NLMSG_DONE, 0, 0, os.getpid()) + payload)
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"dropped": self.dropped, "queue_dropped": self.queue_dropped, "backlog": self._queue.qsize()}
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._socket = self._open_socket()
+        self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 * 1024 * 1024)
+        self._subscribe(self._socket, PROC_CN_MCAST_LISTEN)
+        self._worker = threading.Thread(target=self._run_callbacks, name="proc-connector-callbacks", daemon=True)
+        self._worker.start()
+        self._thread = threading.Thread(target=self._run, name="proc-connector", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        for thread in (self._thread, self._worker):
+            if thread is not None:
+                thread.join(timeout=2)
+        self._thread = None
+        self._worker = None
+        if self._socket is not None:
+            try:
+                self._subscribe(self._socket, PROC_CN_MCAST_IGNORE)
+            except OSError:
+                pass
+            self._socket.close()
+            self._socket = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                ready, _, _ = select.select([self._socket], [], [], 1.0)
+                if not ready:
+                    continue
+                data = self._socket.recv(65536)
+            except OSError as e:
+                if e.errno == errno.ENOBUFS:
+                    # The kernel dropped events because we fell behind
+                    self.dropped += 1
+                elif not self._stop.is_set():
+                    print(f"Error reading process events: {e}")
+                continue
+            self._dispatch(data)
+
+    def _run_callbacks(self):
+        while not self._stop.is_set():
+            try:
+                callback, args = self._queue.get(timeout=1.0)
+            except queue.Empty:
+                continue
+            try:
+                callback(*args)
+            except Exception as e:
+                print(f"Error handling process event: {e}")
+
+    def _enqueue(self, callback: Callable, *args):
+        try:
+            self._queue.put_nowait((callback, args))
+        except queue.Full:
+            self.queue_dropped += 1
+
+    def _dispatch(self, data: bytes):
+        offset = 0
+        while offset + _NLMSG_HEADER.size <= len(data):
+            length = _NLMSG_HEADER.unpack_from(data, offset)[0]
+            if length < _NLMSG_HEADER.size:
+                break
+            event_offset = offset + _NLMSG_HEADER.size + _CN_MSG.size
+            if event_offset + _PROC_EVENT.size <= offset + length:
+                try:
+                    self._handle(data, event_offset)
+                except struct.error as e:
+                    print(f"Error parsing process event: {e}")
+            offset += (length + 3) & ~3
+
+    def _handle(self, data: bytes, offset: int):
+        what = _PROC_EVENT.unpack_from(data, offset)[0]
+        offset += _PROC_EVENT.size
+        if what == PROC_EVENT_EXEC:
+            pid, tgid = _EXEC_EVENT.unpack_from(data, offset)
+            if pid == tgid:
+                self._enqueue(self.on_exec, pid)
+        elif what == PROC_EVENT_EXIT and self.on_exit is not None:
+            pid, tgid, _, _ = _EXIT_EVENT.unpack_from(data, offset)
+            if pid == tgid:
+                self._enqueue(self.on_exit, pid)
+        elif what == PROC_EVENT_FORK and self.on_fork is not None:
+            _, parent_tgid, child_pid, child_tgid = _FORK_EVENT.unpack_from(data, offset)
+            if child_pid == child_tgid:
+                self._enqueue(self.on_fork, parent_tgid, child_pid)
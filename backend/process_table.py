@@ -0,0 +1,74 @@
+"""
+Shared Process Table Collector
+Walks the process table once per cycle and shares the rows with every process detector
+"""
+
+import time
+from typing import Any, Dict, Iterator, List, Tuple
+
+import psutil
+
+
+class ProcessTable:
+    """Immutable result of one process table walk"""
+
+    def __init__(self, rows: List[Dict[str, Any]], collected_at: float, duration: float):
+        self.rows = rows
+        self.collected_at = collected_at
+        self.duration = duration
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return iter(self.rows)
+
+
+class ProcessTableCollector:
+    # Union of every attribute the process detectors read
+    ATTRS = ['pid', 'ppid', 'name', 'cpu_percent', 'memory_percent', 'cmdline', 'create_time', 'exe']
+
+    def __init__(self):
+        # pid -> (Process, create_time); kept between cycles so cpu_percent
+        # is measured against the previous walk instead of returning 0.0
+        self._cache: Dict[int, Tuple[psutil.Process, float]] = {}
+
+    def _new_process(self, pid: int) -> Tuple[psutil.Process, float]:
+        proc = psutil.Process(pid)
+        create_time = proc.create_time()
+        self._cache[pid] = (proc, create_time)
+        return proc, create_time
+
+    def collect(self) -> ProcessTable:
+        """Walk the process table once and return every row"""
+        started = time.monotonic()
+        rows = []
+        pids = psutil.pids()
+
+        for pid in pids:
+            try:
+                cached = self._cache.get(pid)
+                if cached is not None:
+                    proc, create_time = cached
+                    with proc.oneshot():
+                        # Process.create_time() is cached on the object, so read the platform value;
+                        # inside oneshot() that read is shared with as_dict() instead of costing extra
+                        if proc._proc.create_time() == create_time:
+                            rows.append(proc.as_dict(self.ATTRS))
+                            continue
+                    # PID was reused by a new process; the CPU delta belongs to the old one
+                # The first as_dict() call primes cpu_percent for the next cycle
+                proc, _ = self._new_process(pid)
+                info = proc.as_dict(self.ATTRS)
+                info['cpu_percent'] = 0.0
+                rows.append(info)
+            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+                self._cache.pop(pid, None)
+                continue
+
+        # Drop processes that exited since the previous walk
+        live = set(pids)
+        for pid in [pid for pid in self._cache if pid not in live]:
+            del self._cache[pid]
+
+        return ProcessTable(rows, time.time(), time.monotonic() - started)
@@ -0,0 +1,109 @@
+"""
+Incremental Process Lineage Tree
+Parent/child relationships keyed by (pid, create_time), updated in place from each process table walk
+"""
+
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from process_table import ProcessTable
+
+ProcessKey = Tuple[int, float]
+
+
+class ProcessNode:
+    __slots__ = ('pid', 'create_time', 'ppid', 'name', 'exe')
+
+    def __init__(self, pid: int, create_time: float, ppid: Optional[int], name: Optional[str], exe: Optional[str]):
+        self.pid = pid
+        self.create_time = create_time
+        self.ppid = ppid
+        self.name = name
+        self.exe = exe
+
+
+class ProcessTree:
+    """Process lineage that is only ever patched, never rebuilt.
+
+    Each update inserts processes seen for the first time and drops the
+    ones that exited; process events can patch it between walks. Parents are resolved at query time through the
+    live pid index; a parent that started after its child is a reused
+    PID and ends the chain.
+    """
+
+    def __init__(self, max_depth: int = 64):
+        self.max_depth = max_depth
+        self._nodes: Dict[ProcessKey, ProcessNode] = {}
+        self._by_pid: Dict[int, ProcessKey] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+    def update(self, process_table: ProcessTable) -> Tuple[int, int]:
+        """Apply one walk; returns (inserted, removed)"""
+        with self._lock:
+            return self._apply(process_table)
+
+    def _apply(self, process_table: ProcessTable) -> Tuple[int, int]:
+        live = set()
+        inserted = 0
+        for row in process_table:
+            pid, create_time = row.get('pid'), row.get('create_time')
+            if pid is None or create_time is None:
+                continue
+            key = (pid, create_time)
+            live.add(key)
+            node = self._nodes.get(key)
+            if node is None:
+                self._nodes[key] = ProcessNode(pid, create_time, row.get('ppid'), row.get('name'), row.get('exe'))
+                self._by_pid[pid] = key
+                inserted += 1
+            else:
+                # exec() keeps the pid but replaces the program, and orphans are reparented
+                node.ppid = row.get('ppid')
+                node.name = row.get('name')
+                node.exe = row.get('exe')
+
+        exited = [key for key in self._nodes if key not in live]
+        for key in exited:
+            del self._nodes[key]
+            if self._by_pid.get(key[0]) == key:
+                del self._by_pid[key[0]]
+        return inserted, len(exited)
+
+    def insert(self, pid: int, create_time: float, ppid: Optional[int], name: Optional[str], exe: Optional[str]):
+        """Add or refresh one process, e.g. from an exec event"""
+        with self._lock:
+            key = (pid, create_time)
+            node = self._nodes.get(key)
+            if node is None:
+                self._nodes[key] = ProcessNode(pid, create_time, ppid, name, exe)
+                self._by_pid[pid] = key
+            else:
+                node.name = name
+                node.exe = exe
+
+    def remove(self, pid: int):
+        """Drop a process that exited"""
+        with self._lock:
+            key = self._by_pid.pop(pid, None)
+            if key is not None:
+                self._nodes.pop(key, None)
+
+    def ancestors(self, pid: int, create_time: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Parent chain of a process, nearest first, in O(depth)"""
+        with self._lock:
+            key = self._by_pid.get(pid)
+            if key is None or (create_time is not None and key[1] != create_time):
+                return []
+            chain = []
+            node = self._nodes[key]
+            while len(chain) < self.max_depth and node.ppid:
+                parent_key = self._by_pid.get(node.ppid)
+                if parent_key is None or parent_key[1] > node.create_time or parent_key == key:
+                    break
+                node = self._nodes[parent_key]
+                key = parent_key
+                chain.append({"pid": node.pid, "name": node.name, "exe": node.exe})
+            return chain
@@ -0,0 +1,163 @@
+"""
+Byte Signature Engine
+Compiles literal and wildcard hex signatures into one Aho-Corasick automaton and streams files through it
+"""
+
+import os
+import threading
+from collections import OrderedDict, namedtuple
+from typing import Dict, List, Optional, Tuple
+
+from content_hasher import file_identity
+from pattern_matcher import AhoCorasickMatcher
+
+Signature = namedtuple('Signature', ['name', 'source', 'length', 'fragments'])
+
+
+def parse_signature(value: str) -> List[Optional[int]]:
+    """Parse `"literal"` or `{ 6a ?? 6b }` into a list of byte values, None for wildcards"""
+    value = value.strip()
+    if value.startswith('{') and value.endswith('}'):
+        pattern = []
+        for token in value[1:-1].split():
+            pattern.append(None if token == '??' else int(token, 16))
+        return pattern
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in '"\'':
+        # unicode_escape maps raw UTF-8 bytes to latin-1 code points, so this round-trips them
+        return list(value[1:-1].encode('utf-8').decode('unicode_escape').encode('latin-1'))
+    raise ValueError(f"Unrecognised signature: {value}")
+
+
+class SignatureEngine:
+    """Multi-pattern byte signature scanner.
+
+    Rules files contain `name = "literal"` or `name = { hex ?? hex }`
+    lines. The longest literal run of each signature is compiled into a
+    shared automaton; anchor hits are then verified against the full
+    pattern. Files are streamed in chunks with an overlap of the longest
+    signature, so memory stays bounded regardless of file size.
+    """
+
+    def __init__(self, chunk_size: int = 64 * 1024, max_scan_bytes: int = 8 * 1024 * 1024,
+                 cache_size: int = 50000):
+        self.chunk_size = chunk_size
+        self.max_scan_bytes = max_scan_bytes
+        self.cache_size = cache_size
+        self.signatures: List[Signature] = []
+        self._matcher = AhoCorasickMatcher()
+        # anchor -> (signature index, anchor offset) for every signature sharing that literal
+        self._anchors: Dict[bytes, List[Tuple[int, int]]] = {}
+        self._max_length = 0
+        self._cache: "OrderedDict[Tuple[int, int, int, int], List[str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.signatures)
+
+    def add(self, name: str, pattern: List[Optional[int]], source: str = "builtin"):
+        """Add a signature given as byte values with None wildcards"""
+        fragments = []
+        start = None
+        for position, value in enumerate(pattern + [None]):
+            if value is not None and start is None:
+                start = position
+            elif value is None and start is not None:
+                fragments.append((start, bytes(pattern[start:position])))
+                start = None
+        if not fragments:
+            raise ValueError(f"Signature {name} has no literal bytes")
+
+        anchor_offset, anchor = max(fragments, key=lambda fragment: len(fragment[1]))
+        index = len(self.signatures)
+        self.signatures.append(Signature(name, source, len(pattern), fragments))
+        if anchor not in self._anchors:
+            self._anchors[anchor] = []
+            self._matcher.add(anchor)
+        self._anchors[anchor].append((index, anchor_offset))
+        self._max_length = max(self._max_length, len(pattern))
+
+    def load_rules_file(self, path: str) -> int:
+        loaded = 0
+        with open(path, encoding='utf-8') as f:
+            for line_number, line in enumerate(f, 1):
+                line = line.strip()
+                if not line or line.startswith('#'):
+                    continue
+                name, separator, value = line.partition('=')
+                try:
+                    if not separator:
+                        raise ValueError("expected name = pattern")
+                    self.add(name.strip(), parse_signature(value), os.path.basename(path))
+                    loaded += 1
+                except ValueError as e:
+                    print(f"Skipping signature at {path}:{line_number}: {e}")
+        return loaded
+
+    def load_rules_directory(self, directory: str) -> int:
+        """Load every *.rules file and compile the automaton"""
+        loaded = 0
+        for entry in sorted(os.scandir(directory), key=lambda e: e.name):
+            if entry.is_file() and entry.name.endswith('.rules'):
+                loaded += self.load_rules_file(entry.path)
+        self._matcher.build()
+        return loaded
+
+    def _verify(self, buffer: bytes, start: int, signature: Signature) -> bool:
+        if start < 0 or start + signature.length > len(buffer):
+            return False
+        return all(buffer[start + offset:start + offset + len(fragment)] == fragment
+                   for offset, fragment in signature.fragments)
+
+    def scan_bytes(self, buffer: bytes) -> List[str]:
+        """Names of signatures found in an in-memory buffer"""
+        hits = []
+        for match in self._matcher.search(buffer):
+            anchor_start = match.end - len(match.pattern)
+            for index, anchor_offset in self._anchors[match.pattern]:
+                signature = self.signatures[index]
+                if signature.name not in hits and self._verify(buffer, anchor_start - anchor_offset, signature):
+                    hits.append(signature.name)
+        return hits
+
+    def scan_file(self, path: str, st: Optional[os.stat_result] = None) -> List[str]:
+        """Stream a file through the automaton; results are cached by file identity"""
+        if not self.signatures:
+            return []
+        try:
+            st = st or os.stat(path)
+        except OSError:
+            return []
+        key = file_identity(st)
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+
+        hits: List[str] = []
+        overlap = self._max_length - 1
+        tail = b''
+        scanned = 0
+        try:
+            with open(path, 'rb') as f:
+                while scanned < self.max_scan_bytes:
+                    chunk = f.read(min(self.chunk_size, self.max_scan_bytes - scanned))
+                    if not chunk:
+                        break
+                    scanned += len(chunk)
+                    # Keep the tail of the previous chunk so signatures spanning a boundary are seen whole
+                    buffer = tail + chunk
+                    for name in self.scan_bytes(buffer):
+                        if name not in hits:
+                            hits.append(name)
+                    tail = buffer[-overlap:] if overlap else b''
+        except OSError:
+            return []
+
+        with self._lock:
+            self._cache[key] = hits
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return hits
+
+    def scan_files(self, files: List[Tuple[str, os.stat_result]]) -> Dict[str, List[str]]:
+        return {path: self.scan_file(path, st) for path, st in files}
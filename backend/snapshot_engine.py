@@ -0,0 +1,131 @@
+"""
+Background Snapshot Engine
+Runs the registered detectors on their own schedules off the request path and publishes immutable, versioned snapshots
+"""
+
+import asyncio
+import secrets
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+
+@dataclass(frozen=True)
+class ThreatSnapshot:
+    """Result of one collection cycle. Handlers must treat the contents as read-only."""
+    version: int
+    created_at: str
+    system_threats: Dict[str, Any]
+    system_health: Dict[str, Any]
+    process_summary: Dict[str, Any]
+    collection_seconds: float
+    detector_status: Dict[str, Dict[str, Any]]
+
+
+class SnapshotEngine:
+    """Publishes a new snapshot whenever at least one detector has produced fresh results.
+
+    Each detector runs on the interval it declared in the detector
+    registry; the snapshot merges the latest result of every detector.
+    """
+
+    def __init__(self, detector, max_sleep: float = 1.0):
+        self.detector = detector
+        self.registry = detector.detectors
+        self.max_sleep = max_sleep
+        # Versions restart at 1 on every start; this keeps validators built from them unique
+        self.instance_id = secrets.token_hex(4)
+        self._snapshot: Optional[ThreatSnapshot] = None
+        self._version = 0
+        self._revision = -1
+        self._ready: Optional[asyncio.Event] = None
+        self._listeners: List[Callable[[ThreatSnapshot], None]] = []
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def latest(self) -> Optional[ThreatSnapshot]:
+        """Most recently published snapshot, or None before the first cycle completes"""
+        return self._snapshot
+
+    def add_listener(self, listener: Callable[[ThreatSnapshot], None]):
+        """Call `listener` on the event loop with every newly published snapshot"""
+        self._listeners.append(listener)
+
+    async def start(self):
+        """Start the background collector task on the running event loop"""
+        if self._task is not None:
+            return
+        self._ready = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Cancel the collector task and wait for it to exit"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def wait_for_snapshot(self, timeout: float = 30.0) -> ThreatSnapshot:
+        """Return the latest snapshot, waiting for the first one if necessary"""
+        if self._snapshot is not None:
+            return self._snapshot
+        if self._ready is None:
+            raise RuntimeError("Snapshot engine has not been started")
+        await asyncio.wait_for(self._ready.wait(), timeout)
+        return self._snapshot
+
+    def collect(self) -> Optional[ThreatSnapshot]:
+        """Start the detectors that are due and build the next snapshot, or None if no results changed"""
+        started = time.monotonic()
+        self.registry.run_due()
+        # Runs recorded by the worker threads since the last tick, late ones included, are picked up here
+        revision = self.registry.revision
+        if revision == self._revision:
+            return None
+        self._revision = revision
+        if self._snapshot is None and not self.registry.reported():
+            # The first snapshot waits for every detector, so early requests get a 503 rather than empty data
+            return None
+        system_threats = self.registry.results()
+        system_threats["incomplete_detectors"] = self.registry.incomplete()
+        system_threats["timestamp"] = datetime.now().isoformat()
+        self._version += 1
+        return ThreatSnapshot(
+            version=self._version,
+            created_at=system_threats["timestamp"],
+            system_threats=system_threats,
+            system_health=system_threats.get("system_health", {}),
+            process_summary=system_threats.get("process_summary", {}),
+            collection_seconds=time.monotonic() - started,
+            detector_status=self.registry.status()
+        )
+
+    def _notify(self, snapshot: ThreatSnapshot):
+        for listener in self._listeners:
+            try:
+                listener(snapshot)
+            except Exception as e:
+                print(f"Error in snapshot listener: {e}")
+
+    async def _run(self):
+        while True:
+            try:
+                snapshot = await asyncio.to_thread(self.collect)
+                if snapshot is not None:
+                    self._snapshot = snapshot
+                    self._ready.set()
+                    self._notify(snapshot)
+            except Exception as e:
+                print(f"Error collecting snapshot: {e}")
+                await asyncio.sleep(self.max_sleep)
+                continue
+            # Wake when a detector finishes, one becomes due, or a running one reaches its timeout
+            next_due = self.registry.next_due()
+            delay = self.max_sleep if next_due is None else next_due - time.monotonic()
+            await asyncio.to_thread(self.registry.wait_for_change, self._revision,
+                                    min(self.max_sleep, max(0.05, delay)))
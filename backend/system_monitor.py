@@ -7,11 +7,30 @@ import psutil
 import socket
 import subprocess
 import json
-import re
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import hashlib
 import os
+import struct
+import threading
+import time
+from collections import OrderedDict
+from health_sampler import HealthSampler
+from process_table import ProcessTable, ProcessTableCollector
+from process_tree import ProcessTree
+from proc_connector import ProcConnectorListener
+from pattern_matcher import AhoCorasickMatcher
+from ip_reputation import IPReputationIndex
+from proc_net import Connection, ProcNetCollector
+from sock_diag import SockDiagCollector
+from connection_snapshot import ConnectionSnapshot
+from file_watcher import InotifyFileWatcher
+from dir_walker import DirectoryWalker
+from file_baseline import FileBaseline
+from content_hasher import ContentHasher
+from signature_engine import SignatureEngine
+from hash_db import HashSet
+from detector_registry import DetectorRegistry, DetectorSpec
 
 class MacOSThreatDetector:
     def __init__(self):
@@ -20,6 +39,14 @@ class MacOSThreatDetector:
             'backdoor', 'keylogger', 'trojan', 'malware',
             'suspicious', 'hack', 'exploit'
         ]
+
+        self.suspicious_cmdline_keywords = [
+            'mining', 'pool', 'stratum', 'crypto', 'coin'
+        ]
+
+        # Optional external IOC list, one pattern per line ("cmdline:" prefix for arguments)
+        self.ioc_patterns_file = os.getenv("IOC_PATTERNS_FILE")
+        self.build_process_matchers()
         
         self.suspicious_network_ports = [
             4444, 5555, 6666, 7777, 8888, 9999,  # Common backdoor ports
@@ -32,134 +59,549 @@ class MacOSThreatDetector:
             '/Library/LaunchDaemons', '/Library/LaunchAgents',
             '/System/Library/LaunchDaemons'
         ]
+        self.file_change_window = 3600  # seconds
+        self.directory_walker = DirectoryWalker(max_depth=int(os.getenv("FILE_SCAN_DEPTH", "0")))
+        self.content_hasher = ContentHasher()
+        self.signature_rules_dir = os.getenv(
+            "SIGNATURE_RULES_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "signatures")
+        )
+        self.build_signature_engine()
+
+        # Sorted SHA-256 hash set files (see hash_db.py) for running executables
+        self.known_bad_hashes = self._load_hash_set(os.getenv("KNOWN_BAD_HASHES"))
+        self.known_good_hashes = self._load_hash_set(os.getenv("KNOWN_GOOD_HASHES"))
+
+        # "window" flags recently modified files; "baseline" reports deltas against a saved baseline
+        self.file_detection_mode = os.getenv("FILE_DETECTION_MODE", "window").lower()
+        self.file_baseline: Optional[FileBaseline] = None
+        if self.file_detection_mode == "baseline":
+            self.file_baseline = FileBaseline(os.getenv(
+                "FILE_BASELINE_PATH",
+                os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "file_baseline.bin")
+            ), self.content_hasher)
+            try:
+                self._file_baseline_loaded = self.file_baseline.load()
+            except (OSError, ValueError, struct.error) as e:
+                print(f"Error loading file baseline, starting a new one: {e}")
+                self._file_baseline_loaded = False
+
+        # inotify keeps an index of recent changes on Linux; otherwise directories are polled
+        self.file_monitor_mode = os.getenv("FILE_MONITOR", "auto").lower()
+        self.file_watcher: Optional[InotifyFileWatcher] = None
+        if (self.file_baseline is None and self.file_monitor_mode in ("auto", "inotify")
+                and InotifyFileWatcher.available()):
+            try:
+                self.file_watcher = InotifyFileWatcher(
+                    self.high_risk_directories, self.scan_directory, retention=self.file_change_window,
+                    max_depth=self.directory_walker.max_depth
+                )
+                self.file_watcher.start()
+            except OSError as e:
+                print(f"Error starting file watcher, falling back to polling: {e}")
+                self.file_watcher = None
+
+        # Reserved/local ranges are suspicious as remote peers; blocklists add more
+        self.suspicious_ip_ranges = {
+            'reserved': ['0.0.0.0/8', '255.0.0.0/8'],
+            'loopback': ['127.0.0.0/8'],
+            'private': ['10.0.0.0/8', '172.16.0.0/12', '192.168.0.0/16']
+        }
+        self.ip_blocklist_dir = os.getenv("IP_BLOCKLIST_DIR")
+        self.build_ip_reputation()
+
+        # Connection source: netlink sock_diag, then /proc/net parsing, then psutil
+        self.connection_collector_mode = os.getenv("CONNECTION_COLLECTOR", "auto").lower()
+        self.connection_collectors = self.build_connection_collectors()
+        self._connection_generation = 0
+
+        self.health_sampler = HealthSampler()
+        self.health_sampler.start()
+
+        self.process_collector = ProcessTableCollector()
+        self.process_tree = ProcessTree()
+        self._process_table: Optional[ProcessTable] = None
+
+        # Exec events from the Linux proc connector catch processes that exit between walks
+        self.process_events_mode = os.getenv("PROC_EVENTS", "auto").lower()
+        self.process_events: Optional[ProcConnectorListener] = None
+        self.exec_threat_retention = 600  # seconds
+        self.exec_threat_limit = 1000
+        self._exec_threats: "OrderedDict[int, Any]" = OrderedDict()
+        self._exec_threats_lock = threading.Lock()
+        self.start_process_events()
+
+        self.detectors = self.build_detector_registry()
+
+    def build_process_matchers(self):
+        """Compile process name and command line patterns into Aho-Corasick automata"""
+        self.process_name_matcher = AhoCorasickMatcher()
+        self.cmdline_matcher = AhoCorasickMatcher()
+        for pattern in self.suspicious_processes:
+            self.process_name_matcher.add(pattern.lower(), "builtin")
+        for keyword in self.suspicious_cmdline_keywords:
+            self.cmdline_matcher.add(keyword.lower(), "builtin")
+
+        if self.ioc_patterns_file:
+            try:
+                with open(self.ioc_patterns_file, encoding='utf-8') as f:
+                    for line in f:
+                        line = line.strip().lower()
+                        if not line or line.startswith('#'):
+                            continue
+                        if line.startswith('cmdline:'):
+                            self.cmdline_matcher.add(line[len('cmdline:'):].strip(), self.ioc_patterns_file)
+                        else:
+                            self.process_name_matcher.add(line, self.ioc_patterns_file)
+            except OSError as e:
+                print(f"Error loading IOC patterns: {e}")
+
+        self.process_name_matcher.build()
+        self.cmdline_matcher.build()
+
+    def build_ip_reputation(self):
+        """Load builtin ranges and local blocklist files into the IP reputation index"""
+        self.ip_reputation = IPReputationIndex()
+        for category, cidrs in self.suspicious_ip_ranges.items():
+            for cidr in cidrs:
+                self.ip_reputation.add(cidr, category)
+        if self.ip_blocklist_dir:
+            try:
+                self.ip_reputation.load_directory(self.ip_blocklist_dir)
+            except OSError as e:
+                print(f"Error loading IP blocklists: {e}")
+        self.ip_reputation.build()
+
+    def build_connection_collectors(self) -> List[Any]:
+        """Fast connection collectors to try in order; psutil is always the final fallback"""
+        mode = self.connection_collector_mode
+        collectors = []
+        if mode in ("auto", "netlink") and SockDiagCollector.available():
+            collectors.append(SockDiagCollector())
+        if mode in ("auto", "netlink", "procfs") and ProcNetCollector.available():
+            collectors.append(ProcNetCollector())
+        return collectors
+
+    def _load_hash_set(self, path: Optional[str]) -> Optional[HashSet]:
+        if not path:
+            return None
+        try:
+            return HashSet(path)
+        except (OSError, ValueError) as e:
+            print(f"Error loading hash set {path}: {e}")
+            return None
+
+    def hash_executables(self, process_table: ProcessTable) -> Dict[str, str]:
+        """SHA-256 per distinct executable path; each binary is only read once per (inode, mtime)"""
+        files = []
+        seen = set()
+        for proc_info in process_table:
+            exe = proc_info.get('exe')
+            if not exe or exe in seen:
+                continue
+            seen.add(exe)
+            # /proc/<pid>/exe still opens binaries that were deleted after exec
+            proc_exe = f"/proc/{proc_info['pid']}/exe"
+            for path in (proc_exe, exe):
+                try:
+                    files.append((exe, path, os.stat(path)))
+                    break
+                except OSError:
+                    continue
+
+        hashes = self.content_hasher.hash_files([(path, st) for _, path, st in files])
+        results = {}
+        for exe, path, _ in files:
+            file_hashes = hashes.get(path)
+            if file_hashes is not None:
+                results[exe] = file_hashes.sha256
+        return results
+
+    def build_signature_engine(self):
+        """Compile the byte signatures used to scan new and changed files"""
+        self.signature_engine = SignatureEngine()
+        try:
+            self.signature_engine.load_rules_directory(self.signature_rules_dir)
+        except OSError as e:
+            print(f"Error loading signature rules: {e}")
+
+    def collect_connection_snapshot(self) -> ConnectionSnapshot:
+        """Enumerate established connections once; the snapshot feeds every network detector this cycle"""
+        connections = None
+        source = "psutil"
+        for collector in self.connection_collectors:
+            try:
+                connections = collector.collect(established_only=True)
+                source = type(collector).__name__
+                break
+            except OSError as e:
+                print(f"Error collecting connections with {type(collector).__name__}: {e}")
+        if connections is None:
+            connections = [Connection.from_psutil(conn) for conn in psutil.net_connections(kind='inet')]
+        self._connection_generation += 1
+        return ConnectionSnapshot(
+            self._connection_generation,
+            [conn for conn in connections if conn.status == 'ESTABLISHED' and conn.raddr],
+            source
+        )
+
+    def collect_process_table(self) -> ProcessTable:
+        """Walk the process table once; the result feeds every process detector this cycle"""
+        self._process_table = self.process_collector.collect()
+        self.process_tree.update(self._process_table)
+        return self._process_table
+
+    def build_detector_registry(self) -> DetectorRegistry:
+        """Register each detector with its own schedule; DETECTOR_INTERVALS overrides the intervals"""
+        # DETECTOR_WORKERS=1 runs due detectors serially in the collector thread
+        registry = DetectorRegistry(max_workers=int(os.getenv("DETECTOR_WORKERS", "4")))
+        registry.register(DetectorSpec("processes", self.run_process_detectors,
+                                       interval=float(os.getenv("SNAPSHOT_INTERVAL", "5")), timeout=20, budget=1.0,
+                                       stats=self.process_event_stats))
+        registry.register(DetectorSpec("network", self.run_network_detectors, interval=2, timeout=10, budget=0.5))
+        registry.register(DetectorSpec("files", self.run_file_detectors,
+                                       interval=60 if self.file_baseline is not None else 10, timeout=60, budget=5.0))
+        registry.register(DetectorSpec("health", self.run_health_detector, interval=2, timeout=5, budget=0.1))
+        registry.set_intervals(DetectorRegistry.parse_intervals(os.getenv("DETECTOR_INTERVALS")))
+        return registry
+
+    def run_process_detectors(self) -> Dict[str, Any]:
+        process_table = self.collect_process_table()
+        return {
+            "process_threats": self.detect_suspicious_processes(process_table),
+            "process_summary": self.get_running_processes_summary(process_table)
+        }
+
+    def run_network_detectors(self) -> Dict[str, Any]:
+        connection_snapshot = self.collect_connection_snapshot()
+        return {
+            "network_threats": self.detect_network_anomalies(connection_snapshot),
+            "active_connections": self.get_suspicious_connections(connection_snapshot),
+            "connection_generation": connection_snapshot.generation
+        }
+
+    def run_file_detectors(self) -> Dict[str, Any]:
+        return {"file_threats": self.detect_file_anomalies()}
+
+    def run_health_detector(self) -> Dict[str, Any]:
+        return {"system_health": self.get_system_health()}
 
     def get_system_threats(self) -> Dict[str, Any]:
-        """Get comprehensive system threat assessment"""
-        threats = {
-            "process_threats": self.detect_suspicious_processes(),
-            "network_threats": self.detect_network_anomalies(),
-            "file_threats": self.detect_file_anomalies(),
-            "system_health": self.get_system_health(),
-            "active_connections": self.get_suspicious_connections(),
+        """Get comprehensive system threat assessment by running every detector now"""
+        threats = self.detectors.run_all()
+        # Detectors that timed out contribute their previous results, if any
+        threats["incomplete_detectors"] = self.detectors.incomplete()
+        threats["detector_status"] = self.detectors.status()
+        threats["timestamp"] = datetime.now().isoformat()
+        return threats
+
+    def classify_process(self, proc_info: Dict[str, Any], exe_sha256: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Threat record for one process table row, or None if it looks benign"""
+        proc_name = (proc_info['name'] or '').lower()
+        
+        # Check the executable's content hash against the known-bad/known-good sets
+        hash_reputation = None
+        if exe_sha256 and self.known_bad_hashes is not None and exe_sha256 in self.known_bad_hashes:
+            hash_reputation = "known_bad"
+        elif exe_sha256 and self.known_good_hashes is not None and exe_sha256 in self.known_good_hashes:
+            hash_reputation = "known_good"
+        
+        if hash_reputation == "known_good":
+            # Allowlisted binaries are not flagged by name or argument heuristics
+            return None
+        
+        # Check for suspicious process names
+        name_matches = self.process_name_matcher.matched_patterns(proc_name)
+        is_suspicious = bool(name_matches)
+        
+        # Check for high CPU usage (potential cryptominer)
+        high_cpu = (proc_info['cpu_percent'] or 0) > 80
+        
+        # Check for unusual command line arguments
+        cmdline = ' '.join(proc_info['cmdline'] or []).lower()
+        cmdline_matches = self.cmdline_matcher.matched_patterns(cmdline) if high_cpu else []
+        has_crypto_keywords = bool(cmdline_matches)
+        
+        if not (hash_reputation == "known_bad" or is_suspicious or (high_cpu and has_crypto_keywords)):
+            return None
+        threat_level = "critical" if hash_reputation == "known_bad" or is_suspicious else "high"
+        description = f"Suspicious process detected: {proc_info['name']}"
+        if hash_reputation == "known_bad":
+            description = f"Known malicious executable running: {proc_info['name']} ({proc_info.get('exe')})"
+        return {
+            # create_time keeps the id with the process, not whichever process later reuses the pid
+            "id": f"proc-{proc_info['pid']}-{proc_info.get('create_time') or 0:.2f}",
+            "type": "suspicious_process",
+            "pid": proc_info['pid'],
+            "name": proc_info['name'],
+            "cpu_percent": proc_info['cpu_percent'],
+            "memory_percent": proc_info['memory_percent'],
+            "severity": threat_level,
+            "matched_patterns": name_matches if is_suspicious else cmdline_matches,
+            "exe": proc_info.get('exe'),
+            "exe_sha256": exe_sha256,
+            "hash_reputation": hash_reputation,
+            "ancestry": self.process_tree.ancestors(proc_info['pid'], proc_info.get('create_time')),
+            "description": description,
             "timestamp": datetime.now().isoformat()
         }
-        return threats
 
-    def detect_suspicious_processes(self) -> List[Dict[str, Any]]:
+    def start_process_events(self):
+        """Subscribe to exec/exit events so processes are classified the moment they start"""
+        if self.process_events_mode not in ("auto", "netlink") or not ProcConnectorListener.available():
+            return
+        try:
+            self.process_events = ProcConnectorListener(self._on_process_exec, on_exit=self._on_process_exit)
+            self.process_events.start()
+        except OSError as e:
+            print(f"Error starting process event listener, relying on polling: {e}")
+            self.process_events = None
+
+    def process_event_stats(self) -> Optional[Dict[str, Any]]:
+        """Event listener counters, or None when processes are only found by polling"""
+        if self.process_events is None:
+            return None
+        return dict(self.process_events.stats(), running=self.process_events.running)
+
+    def _on_process_exec(self, pid: int):
+        # Runs on the listener's callback worker, never on the netlink reader thread
+        try:
+            proc = psutil.Process(pid)
+            proc_info = proc.as_dict([attr for attr in ProcessTableCollector.ATTRS if attr != 'cpu_percent'])
+        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+            return
+        # No CPU history exists yet at exec time
+        proc_info['cpu_percent'] = 0.0
+        self.process_tree.insert(pid, proc_info['create_time'], proc_info['ppid'], proc_info['name'], proc_info['exe'])
+
+        exe_sha256 = None
+        if proc_info.get('exe') and (self.known_bad_hashes is not None or self.known_good_hashes is not None):
+            file_hashes = self.content_hasher.hash_file(f"/proc/{pid}/exe")
+            exe_sha256 = file_hashes.sha256 if file_hashes is not None else None
+
+        threat = self.classify_process(proc_info, exe_sha256)
+        if threat is None:
+            return
+        threat.update({"detection": "exec_event", "exited": False})
+        with self._exec_threats_lock:
+            self._exec_threats[pid] = (time.monotonic(), threat)
+            self._exec_threats.move_to_end(pid)
+            while len(self._exec_threats) > self.exec_threat_limit:
+                self._exec_threats.popitem(last=False)
+
+    def _on_process_exit(self, pid: int):
+        self.process_tree.remove(pid)
+        with self._exec_threats_lock:
+            entry = self._exec_threats.get(pid)
+            if entry is not None:
+                entry[1]["exited"] = True
+
+    def recent_exec_threats(self) -> List[Dict[str, Any]]:
+        """Threats detected from exec events within the retention window"""
+        cutoff = time.monotonic() - self.exec_threat_retention
+        with self._exec_threats_lock:
+            while self._exec_threats and next(iter(self._exec_threats.values()))[0] < cutoff:
+                self._exec_threats.popitem(last=False)
+            return [dict(threat) for _, threat in self._exec_threats.values()]
+
+    def detect_suspicious_processes(self, process_table: Optional[ProcessTable] = None) -> List[Dict[str, Any]]:
         """Detect potentially malicious processes"""
         suspicious = []
         
         try:
-            for proc in psutil.process_iter(['pid', 'name', 'cpu_percent', 'memory_percent', 'cmdline']):
+            if process_table is None:
+                process_table = self.collect_process_table()
+            exe_hashes = {}
+            if self.known_bad_hashes is not None or self.known_good_hashes is not None:
+                exe_hashes = self.hash_executables(process_table)
+
+            for proc_info in process_table:
                 try:
-                    proc_info = proc.info
-                    proc_name = proc_info['name'].lower()
-                    
-                    # Check for suspicious process names
-                    is_suspicious = any(sus in proc_name for sus in self.suspicious_processes)
-                    
-                    # Check for high CPU usage (potential cryptominer)
-                    high_cpu = proc_info['cpu_percent'] > 80
-                    
-                    # Check for unusual command line arguments
-                    cmdline = ' '.join(proc_info['cmdline'] or []).lower()
-                    has_crypto_keywords = any(keyword in cmdline for keyword in 
-                                            ['mining', 'pool', 'stratum', 'crypto', 'coin'])
-                    
-                    if is_suspicious or (high_cpu and has_crypto_keywords):
-                        threat_level = "critical" if is_suspicious else "high"
-                        suspicious.append({
-                            "id": f"proc-{proc_info['pid']}",
-                            "type": "suspicious_process",
-                            "pid": proc_info['pid'],
-                            "name": proc_info['name'],
-                            "cpu_percent": proc_info['cpu_percent'],
-                            "memory_percent": proc_info['memory_percent'],
-                            "severity": threat_level,
-                            "description": f"Suspicious process detected: {proc_info['name']}",
-                            "timestamp": datetime.now().isoformat()
-                        })
-                        
-                except (psutil.NoSuchProcess, psutil.AccessDenied):
+                    threat = self.classify_process(proc_info, exe_hashes.get(proc_info.get('exe')))
+                    if threat is not None:
+                        suspicious.append(threat)
+                except (KeyError, TypeError):
                     continue
+
+            # Processes caught at exec time that the walk missed or no longer sees
+            reported = {threat['id'] for threat in suspicious}
+            for threat in self.recent_exec_threats():
+                if threat['id'] not in reported:
+                    suspicious.append(threat)
                     
         except Exception as e:
             print(f"Error in process detection: {e}")
             
         return suspicious
 
-    def detect_network_anomalies(self) -> List[Dict[str, Any]]:
+    def detect_network_anomalies(self, connection_snapshot: Optional[ConnectionSnapshot] = None) -> List[Dict[str, Any]]:
         """Detect suspicious network activity"""
         anomalies = []
         
         try:
-            connections = psutil.net_connections(kind='inet')
+            if connection_snapshot is None:
+                connection_snapshot = self.collect_connection_snapshot()
+            connections = connection_snapshot.connections
+            # Classify every remote address in one batch against the reputation index
+            reputations = self.ip_reputation.lookup_many([conn.raddr.ip for conn in connections])
             
-            for conn in connections:
-                if conn.status == 'ESTABLISHED' and conn.raddr:
-                    remote_ip = conn.raddr.ip
-                    remote_port = conn.raddr.port
-                    local_port = conn.laddr.port
-                    
-                    # Check for suspicious ports
-                    if remote_port in self.suspicious_network_ports or local_port in self.suspicious_network_ports:
-                        anomalies.append({
-                            "id": f"net-{local_port}-{remote_port}",
-                            "type": "suspicious_connection",
-                            "local_port": local_port,
-                            "remote_ip": remote_ip,
-                            "remote_port": remote_port,
-                            "severity": "high",
-                            "description": f"Connection to suspicious port {remote_port}",
-                            "timestamp": datetime.now().isoformat()
-                        })
+            for conn, reputation in zip(connections, reputations):
+                remote_ip = conn.raddr.ip
+                remote_port = conn.raddr.port
+                local_port = conn.laddr.port
+                # Threat ids must identify the connection, not just the peer, so streams can diff them
+                connection_key = f"{conn.laddr.ip}:{local_port}-{remote_ip}:{remote_port}"
+                
+                # Check for suspicious ports
+                if remote_port in self.suspicious_network_ports or local_port in self.suspicious_network_ports:
+                    anomalies.append({
+                        "id": f"net-{connection_key}",
+                        "type": "suspicious_connection",
+                        "local_port": local_port,
+                        "remote_ip": remote_ip,
+                        "remote_port": remote_port,
+                        "pid": conn.pid,
+                        "severity": "high",
+                        "description": f"Connection to suspicious port {remote_port}",
+                        "timestamp": datetime.now().isoformat()
+                    })
+                
+                # Check for connections to known malicious IPs
+                if reputation:
+                    anomalies.append({
+                        "id": f"ip-{connection_key}",
+                        "type": "malicious_ip",
+                        "remote_ip": remote_ip,
+                        "remote_port": remote_port,
+                        "reputation": reputation,
+                        "pid": conn.pid,
+                        "severity": "critical",
+                        "description": f"Connection to potentially malicious IP: {remote_ip} ({reputation})",
+                        "timestamp": datetime.now().isoformat()
+                    })
                     
-                    # Check for connections to known malicious IPs (simplified check)
-                    if self.is_suspicious_ip(remote_ip):
-                        anomalies.append({
-                            "id": f"ip-{remote_ip}",
-                            "type": "malicious_ip",
-                            "remote_ip": remote_ip,
-                            "remote_port": remote_port,
-                            "severity": "critical",
-                            "description": f"Connection to potentially malicious IP: {remote_ip}",
-                            "timestamp": datetime.now().isoformat()
-                        })
-                        
         except Exception as e:
             print(f"Error in network detection: {e}")
             
         return anomalies
 
+    def scan_directory(self, directory: str, fresh_stats: bool = False) -> List[Any]:
+        """(filepath, stat) for every regular file in directory, down to FILE_SCAN_DEPTH levels"""
+        return self.directory_walker.scan(directory, fresh_stats)
+
+    def scan_file_entries(self) -> Dict[str, Any]:
+        """Current baseline entries for every file in the sensitive directories, keyed by path"""
+        files = []
+        self._file_directories = {}
+        for directory in self.high_risk_directories:
+            try:
+                # Fresh stats: in-place edits leave the directory mtime, and so the cached listing, unchanged
+                for filepath, stat in self.scan_directory(directory, fresh_stats=True):
+                    files.append((filepath, stat))
+                    self._file_directories[filepath] = directory
+            except PermissionError:
+                continue
+        return self.file_baseline.entries_for(files)
+
+    def rebaseline_files(self) -> int:
+        """Accept the current state of the sensitive directories as the file baseline; returns the file count"""
+        current = self.scan_file_entries()
+        self.file_baseline.rebaseline(current)
+        self._file_baseline_loaded = True
+        # Re-run the file detector now so accepted deltas leave the threat list
+        self.detectors.run_soon("files")
+        return len(current)
+
+    def detect_file_baseline_changes(self) -> List[Dict[str, Any]]:
+        """New, changed and deleted files relative to the saved baseline"""
+        current = self.scan_file_entries()
+        if not self._file_baseline_loaded:
+            # First run seeds the baseline instead of flagging every existing file
+            self.file_baseline.rebaseline(current)
+            self._file_baseline_loaded = True
+            return []
+
+        anomalies = []
+        descriptions = {
+            "new": "New file in sensitive directory",
+            "changed": "File changed in sensitive directory",
+            "deleted": "File deleted from sensitive directory"
+        }
+        for delta in self.file_baseline.compare(current):
+            directory = self._file_directories.get(delta.path) or next(
+                (d for d in self.high_risk_directories if delta.path.startswith(os.path.join(d, ''))),
+                os.path.dirname(delta.path)
+            )
+            threat = self._file_threat(delta.path, directory, delta.entry.mtime_ns / 1e9, delta.change)
+            threat["severity"] = "low" if delta.change == "deleted" else "medium"
+            threat["changed_fields"] = delta.fields
+            threat["sha256"] = delta.entry.sha256.hex() or None
+            threat["description"] = f"{descriptions[delta.change]}: {os.path.basename(delta.path)}"
+            anomalies.append(threat)
+        return anomalies
+
+    def _inspect_file_contents(self, anomalies: List[Dict[str, Any]]):
+        """Hash and signature-scan flagged files; unchanged files are served from cache"""
+        files = []
+        for threat in anomalies:
+            try:
+                files.append((threat["filepath"], os.stat(threat["filepath"])))
+            except OSError:
+                continue
+        hashes = self.content_hasher.hash_files(files)
+        signature_hits = self.signature_engine.scan_files(files)
+        for threat in anomalies:
+            file_hashes = hashes.get(threat["filepath"])
+            if file_hashes is not None:
+                threat["sha256"] = file_hashes.sha256
+                threat["fast_hash"] = file_hashes.fast_hash
+            hits = signature_hits.get(threat["filepath"])
+            if hits:
+                threat["signatures"] = hits
+                threat["severity"] = "critical"
+                threat["description"] = (
+                    f"Malicious content signature ({', '.join(hits)}) in file: {os.path.basename(threat['filepath'])}"
+                )
+
+    def _file_threat(self, filepath: str, directory: str, mtime: float, event: str = "modified") -> Dict[str, Any]:
+        filename = os.path.basename(filepath)
+        return {
+            "id": f"file-{hashlib.md5(filepath.encode()).hexdigest()[:8]}",
+            "type": "suspicious_file",
+            "filepath": filepath,
+            "directory": directory,
+            "event": event,
+            "modified_time": datetime.fromtimestamp(mtime).isoformat(),
+            "severity": "medium",
+            "description": f"Recently modified file in sensitive directory: {filename}",
+            "timestamp": datetime.now().isoformat()
+        }
+
     def detect_file_anomalies(self) -> List[Dict[str, Any]]:
         """Detect suspicious file system activity"""
         anomalies = []
         
         try:
+            if self.file_baseline is not None:
+                anomalies = self.detect_file_baseline_changes()
+
+            # Answer from the inotify index when the watcher is running
+            elif self.file_watcher is not None and self.file_watcher.running:
+                for change in self.file_watcher.recent_changes(self.file_change_window):
+                    anomalies.append(self._file_threat(change.path, change.directory, change.mtime, change.event))
+
             # Check for files in high-risk directories
-            for directory in self.high_risk_directories:
-                if os.path.exists(directory):
+            else:
+                for directory in self.high_risk_directories:
                     try:
-                        for filename in os.listdir(directory):
-                            filepath = os.path.join(directory, filename)
-                            
-                            # Check for recently modified files
-                            if os.path.isfile(filepath):
-                                stat = os.stat(filepath)
-                                # Files modified in last hour
-                                if (datetime.now().timestamp() - stat.st_mtime) < 3600:
-                                    anomalies.append({
-                                        "id": f"file-{hashlib.md5(filepath.encode()).hexdigest()[:8]}",
-                                        "type": "suspicious_file",
-                                        "filepath": filepath,
-                                        "directory": directory,
-                                        "modified_time": datetime.fromtimestamp(stat.st_mtime).isoformat(),
-                                        "severity": "medium",
-                                        "description": f"Recently modified file in sensitive directory: {filename}",
-                                        "timestamp": datetime.now().isoformat()
-                                    })
+                        # Fresh stats: in-place writes leave the directory's cached listing untouched
+                        for filepath, stat in self.scan_directory(directory, fresh_stats=True):
+                            # Files modified in the change window
+                            if (datetime.now().timestamp() - stat.st_mtime) < self.file_change_window:
+                                anomalies.append(self._file_threat(filepath, directory, stat.st_mtime))
                     except PermissionError:
                         continue
+
+            self._inspect_file_contents(anomalies)
                         
         except Exception as e:
             print(f"Error in file detection: {e}")
@@ -169,68 +611,66 @@ class MacOSThreatDetector:
     def get_system_health(self) -> Dict[str, Any]:
         """Get current system health metrics"""
         try:
-            cpu_percent = psutil.cpu_percent(interval=1)
-            memory = psutil.virtual_memory()
-            disk = psutil.disk_usage('/')
+            sample = self.health_sampler.snapshot()
+            cpu_percent = sample["cpu_percent"]
+            memory_percent = sample["memory_percent"]
+            disk_percent = sample["disk_percent"]
             
             # Determine health status
             health_status = "healthy"
-            if cpu_percent > 90 or memory.percent > 90 or disk.percent > 90:
+            if cpu_percent > 90 or memory_percent > 90 or disk_percent > 90:
                 health_status = "warning"
-            if cpu_percent > 95 or memory.percent > 95 or disk.percent > 95:
+            if cpu_percent > 95 or memory_percent > 95 or disk_percent > 95:
                 health_status = "critical"
                 
             return {
                 "status": health_status,
                 "cpu_percent": cpu_percent,
-                "memory_percent": memory.percent,
-                "disk_percent": disk.percent,
+                "cpu_per_core": sample["cpu_per_core"],
+                "cpu_averages": sample["cpu_averages"],
+                "memory_percent": memory_percent,
+                "disk_percent": disk_percent,
                 "uptime": datetime.now().timestamp() - psutil.boot_time(),
-                "process_count": len(psutil.pids())
+                "process_count": len(self._process_table) if self._process_table is not None else len(psutil.pids())
             }
         except Exception as e:
             return {"status": "error", "error": str(e)}
 
-    def get_suspicious_connections(self) -> List[Dict[str, Any]]:
+    def get_suspicious_connections(self, connection_snapshot: Optional[ConnectionSnapshot] = None) -> List[Dict[str, Any]]:
         """Get currently active network connections for analysis"""
         connections = []
         
         try:
-            for conn in psutil.net_connections(kind='inet'):
-                if conn.status == 'ESTABLISHED' and conn.raddr:
-                    connections.append({
-                        "local_address": f"{conn.laddr.ip}:{conn.laddr.port}",
-                        "remote_address": f"{conn.raddr.ip}:{conn.raddr.port}",
-                        "status": conn.status,
-                        "pid": conn.pid
-                    })
+            if connection_snapshot is None:
+                connection_snapshot = self.collect_connection_snapshot()
+            for conn in connection_snapshot:
+                connections.append({
+                    "local_address": f"{conn.laddr.ip}:{conn.laddr.port}",
+                    "remote_address": f"{conn.raddr.ip}:{conn.raddr.port}",
+                    "status": conn.status,
+                    # Only PIDs already resolved for flagged sockets; listing never walks /proc/*/fd
+                    "pid": conn.known_pid
+                })
         except Exception as e:
             print(f"Error getting connections: {e}")
             
         return connections
 
     def is_suspicious_ip(self, ip: str) -> bool:
-        """Simple check for potentially suspicious IPs"""
-        # This is a simplified check - in production, you'd use threat intelligence feeds
-        suspicious_patterns = [
-            r'^0\.', r'^127\.', r'^255\.',  # Invalid/local IPs in external connections
-            r'^10\.',  # Private IP range 10.0.0.0/8
-            r'^172\.(1[6-9]|2[0-9]|3[0-1])\.',  # Private IP range 172.16.0.0/12 only
-            r'^192\.168\.'  # Private IP range 192.168.0.0/16
-        ]
-        
-        return any(re.match(pattern, ip) for pattern in suspicious_patterns)
+        """Check an IP against the reputation index (builtin ranges plus blocklists)"""
+        return self.ip_reputation.lookup(ip) is not None
 
-    def get_running_processes_summary(self) -> Dict[str, Any]:
+    def get_running_processes_summary(self, process_table: Optional[ProcessTable] = None) -> Dict[str, Any]:
         """Get summary of running processes"""
         try:
             processes = []
             total_cpu = 0
             total_memory = 0
             
-            for proc in psutil.process_iter(['pid', 'name', 'cpu_percent', 'memory_percent']):
+            if process_table is None:
+                process_table = self.collect_process_table()
+            for info in process_table:
                 try:
-                    info = proc.info
                     total_cpu += info['cpu_percent'] or 0
                     total_memory += info['memory_percent'] or 0
                     
@@ -242,14 +682,14 @@ class MacOSThreatDetector:
                             "cpu_percent": info['cpu_percent'],
                             "memory_percent": info['memory_percent']
                         })
-                except (psutil.NoSuchProcess, psutil.AccessDenied):
+                except (KeyError, TypeError):
                     continue
                     
             return {
-                "process_count": len(psutil.pids()),
+                "process_count": len(process_table),
                 "high_resource_processes": sorted(processes, key=lambda x: x['cpu_percent'] or 0, reverse=True)[:10],
                 "total_cpu_usage": total_cpu,
-                "system_memory_usage": psutil.virtual_memory().percent
+                "system_memory_usage": self.health_sampler.snapshot()["memory_percent"]
             }
         except Exception as e:
             return {"error": str(e)}
\ No newline at end of file
@@ -0,0 +1,283 @@
+"""
+Versioned Threat Store
+Current threats under stable ids, with a change log so clients can ask for what changed since a snapshot version
+"""
+
+import base64
+import heapq
+import json
+from bisect import bisect_right
+from collections import OrderedDict, namedtuple
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from json_codec import dumps
+
+ThreatChanges = namedtuple('ThreatChanges', ['added', 'changed', 'removed'])
+
+ThreatPage = namedtuple('ThreatPage', ['threats', 'next_cursor'])
+
+SORT_ORDERS = ('newest', 'oldest', 'severity')
+FILTER_FIELDS = ('severity', 'threat_type', 'source')
+SEVERITY_RANK = {"critical": 0, "high": 1, "medium": 2, "low": 3}
+# Types of each sort key's elements, as built by ThreatIndex
+SORT_KEY_TYPES = {
+    'newest': ((int, float), str),
+    'oldest': ((int, float), str),
+    'severity': (int, (int, float), str)
+}
+
+
+# Detail fields re-measured on every scan; a change in them alone does not make a threat "changed"
+VOLATILE_DETAILS = ('cpu_percent', 'memory_percent')
+
+
+def _fingerprint(threat: Dict[str, Any]) -> bytes:
+    # Scan timestamps are regenerated every run, so they do not count as a change.
+    # Records are built with a fixed key order, so no key sorting is needed.
+    stable = {key: value for key, value in threat.items() if key != "timestamp"}
+    details = stable.get("details")
+    if isinstance(details, dict):
+        stable["details"] = {key: value for key, value in details.items() if key not in VOLATILE_DETAILS}
+    return dumps(stable)
+
+
+def _epoch(timestamp: Optional[str]) -> float:
+    try:
+        return datetime.fromisoformat(timestamp).timestamp()
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _iter_from(entries: List[Tuple[Tuple, str]], position: int) -> Iterable[Tuple[Tuple, str]]:
+    # A generator rather than a slice, so resuming deep into an index copies nothing
+    for offset in range(position, len(entries)):
+        yield entries[offset]
+
+
+def encode_cursor(sort: str, key: Tuple) -> str:
+    return base64.urlsafe_b64encode(json.dumps([sort, list(key)]).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str, sort: str) -> Tuple:
+    """Position after which the next page starts; raises ValueError for foreign or malformed cursors"""
+    try:
+        cursor_sort, key = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {e}")
+    if sort not in SORT_KEY_TYPES or cursor_sort != sort:
+        raise ValueError("Cursor was issued for a different sort order")
+    types = SORT_KEY_TYPES[sort]
+    if (not isinstance(key, list) or len(key) != len(types)
+            or any(isinstance(value, bool) or not isinstance(value, kind) for value, kind in zip(key, types))):
+        raise ValueError("Invalid cursor: malformed position")
+    return tuple(key)
+
+
+class ThreatIndex:
+    """Sorted keys for one store version, overall and per filter value.
+
+    Every list holds (sort key, id) in ascending order, so a page is a
+    bisect to the cursor followed by a walk of at most the page size
+    times the selectivity of the remaining filters.
+    """
+
+    def __init__(self, threats: Dict[str, Dict[str, Any]]):
+        self.times: Dict[str, float] = {}
+        keys: Dict[str, List[Tuple[Tuple, str]]] = {sort: [] for sort in SORT_ORDERS}
+        self.by_value: Dict[str, Dict[str, Dict[str, List[Tuple[Tuple, str]]]]] = {
+            sort: {field: {} for field in FILTER_FIELDS} for sort in SORT_ORDERS
+        }
+        for threat_id, threat in threats.items():
+            seen = _epoch(threat.get("timestamp"))
+            self.times[threat_id] = seen
+            rank = SEVERITY_RANK.get(str(threat.get("severity", "")).lower(), len(SEVERITY_RANK))
+            entries = {
+                'newest': ((-seen, threat_id), threat_id),
+                'oldest': ((seen, threat_id), threat_id),
+                'severity': ((rank, -seen, threat_id), threat_id)
+            }
+            for sort, entry in entries.items():
+                keys[sort].append(entry)
+                for field in FILTER_FIELDS:
+                    value = str(threat.get(field, "")).lower()
+                    self.by_value[sort][field].setdefault(value, []).append(entry)
+        for sort in SORT_ORDERS:
+            keys[sort].sort()
+            for values in self.by_value[sort].values():
+                for entries in values.values():
+                    entries.sort()
+        self.keys = keys
+
+    def candidates(self, sort: str, filters: Dict[str, List[str]]) -> Tuple[List[List[Tuple[Tuple, str]]], Optional[str]]:
+        """Sorted lists to merge for the most selective filter, and the field they already satisfy"""
+        best_field, best_lists, best_size = None, [self.keys[sort]], len(self.keys[sort])
+        for field, values in filters.items():
+            lists = [self.by_value[sort][field].get(value, []) for value in values]
+            size = sum(len(entries) for entries in lists)
+            if size < best_size:
+                best_field, best_lists, best_size = field, lists, size
+        return best_lists, best_field
+
+
+class ThreatStore:
+    """Threats keyed by detector-level id, updated once per snapshot.
+
+    Each threat keeps the timestamp of the scan that first reported it,
+    and the CPU/memory readings of the scan that last changed it.
+    `version` is the snapshot version in which something was last added,
+    changed or removed, so it only moves when the threat list does. Ids
+    are ordered by the version in which they last changed, and
+    removals are kept as tombstones, so changes_since() walks only the
+    entries newer than the requested version. When the tombstone log is
+    trimmed, older versions can no longer be diffed and callers fall
+    back to the full list.
+    """
+
+    def __init__(self, build_threats: Callable[[Dict[str, Any]], List[Tuple[str, Dict[str, Any]]]],
+                 tombstone_limit: int = 10000):
+        self.build_threats = build_threats
+        self.tombstone_limit = tombstone_limit
+        self.version = 0
+        self.updated_at: Optional[str] = None  # snapshot time of `version`
+        self.threats: Dict[str, Dict[str, Any]] = {}
+        self._fingerprints: Dict[str, bytes] = {}
+        self._encoded: Dict[str, Tuple[Dict[str, Any], bytes]] = {}
+        self._added_at: Dict[str, int] = {}
+        self._changed: "OrderedDict[str, int]" = OrderedDict()   # id -> version, oldest change first
+        self._removed: "OrderedDict[str, int]" = OrderedDict()   # id -> version removed, oldest first
+        self._floor = 0  # changes_since() is exact for any version >= floor
+        self._index: Optional[ThreatIndex] = None
+
+    def __len__(self) -> int:
+        return len(self.threats)
+
+    def apply(self, snapshot):
+        """Snapshot engine listener: fold a new snapshot into the store"""
+        version = snapshot.version
+        current = dict(self.build_threats(snapshot.system_threats))
+        threats = {}
+        fingerprints = {}
+        modified = False
+        for threat_id, threat in current.items():
+            fingerprint = _fingerprint(threat)
+            fingerprints[threat_id] = fingerprint
+            previous = self.threats.get(threat_id)
+            if previous is None:
+                threats[threat_id] = dict(threat, id=threat_id, first_seen=threat.get("timestamp"))
+                self._added_at[threat_id] = version
+                self._removed.pop(threat_id, None)
+            elif self._fingerprints[threat_id] != fingerprint:
+                threats[threat_id] = dict(threat, id=threat_id, first_seen=previous["first_seen"],
+                                          timestamp=previous["first_seen"])
+            else:
+                threats[threat_id] = previous
+                continue
+            self._changed[threat_id] = version
+            self._changed.move_to_end(threat_id)
+            modified = True
+
+        removed = [threat_id for threat_id in self.threats if threat_id not in current]
+        for threat_id in removed:
+            self._changed.pop(threat_id, None)
+            self._added_at.pop(threat_id, None)
+            self._removed[threat_id] = version
+        while len(self._removed) > self.tombstone_limit:
+            _, self._floor = self._removed.popitem(last=False)
+
+        if self.updated_at is None:
+            self._floor = version
+        if modified or removed or self.updated_at is None:
+            self.version = version
+            self.updated_at = snapshot.created_at
+            self._index = None
+        for threat_id in removed:
+            self._encoded.pop(threat_id, None)
+        self.threats = threats
+        self._fingerprints = fingerprints
+
+    def changes_since(self, version: int) -> Optional[ThreatChanges]:
+        """Threats added, changed and removed after `version`, or None if it cannot be diffed.
+
+        Versions older than the tombstone log, and versions ahead of the
+        store (issued before a restart), both need a full resync.
+        """
+        if version < self._floor or version > self.version:
+            return None
+        added, changed, removed = [], [], []
+        for threat_id in reversed(self._changed):
+            if self._changed[threat_id] <= version:
+                break
+            threat = self.threats[threat_id]
+            (added if self._added_at[threat_id] > version else changed).append(threat)
+        for threat_id in reversed(self._removed):
+            if self._removed[threat_id] <= version:
+                break
+            removed.append(threat_id)
+        added.reverse()
+        changed.reverse()
+        removed.reverse()
+        return ThreatChanges(added, changed, removed)
+
+    def encoded(self, threat: Dict[str, Any]) -> bytes:
+        """JSON for one threat; unchanged threats keep their record object, so they are encoded once"""
+        cached = self._encoded.get(threat["id"])
+        if cached is not None and cached[0] is threat:
+            return cached[1]
+        encoded = dumps(threat)
+        self._encoded[threat["id"]] = (threat, encoded)
+        return encoded
+
+    def encode_list(self, threats: Iterable[Dict[str, Any]]) -> bytes:
+        """JSON array assembled from the per-threat encodings"""
+        return b'[' + b','.join(self.encoded(threat) for threat in threats) + b']'
+
+    def index(self) -> ThreatIndex:
+        """Query indexes, rebuilt lazily the first time they are needed after the threats change"""
+        if self._index is None:
+            self._index = ThreatIndex(self.threats)
+        return self._index
+
+    def query(self, filters: Optional[Dict[str, List[str]]] = None, start: Optional[float] = None,
+              end: Optional[float] = None, sort: str = 'newest', limit: int = 100,
+              cursor: Optional[str] = None) -> ThreatPage:
+        """One page of threats matching every filter, in `sort` order, starting after `cursor`"""
+        if sort not in SORT_ORDERS:
+            raise ValueError(f"Unknown sort order: {sort}")
+        # Repeated values would merge the same index list twice and return duplicates
+        filters = {field: list(dict.fromkeys(value.lower() for value in values))
+                   for field, values in (filters or {}).items() if values}
+        index = self.index()
+        after = decode_cursor(cursor, sort) if cursor else None
+        lists, satisfied = index.candidates(sort, filters)
+        remaining = {field: set(values) for field, values in filters.items() if field != satisfied}
+
+        streams: List[Iterable[Tuple[Tuple, str]]] = []
+        for entries in lists:
+            position = 0
+            if after is not None:
+                # Keys are unique (they end with the id), so this lands just past the cursor entry
+                position = bisect_right(entries, (after, '\U0010ffff'))
+            streams.append(_iter_from(entries, position))
+        merged = streams[0] if len(streams) == 1 else heapq.merge(*streams)
+
+        page = []
+        last_key = None
+        for key, threat_id in merged:
+            seen = index.times[threat_id]
+            if start is not None and seen < start:
+                if sort == 'newest':
+                    break
+                continue
+            if end is not None and seen > end:
+                if sort == 'oldest':
+                    break
+                continue
+            threat = self.threats[threat_id]
+            if any(str(threat.get(field, "")).lower() not in values for field, values in remaining.items()):
+                continue
+            if len(page) == limit:
+                return ThreatPage(page, encode_cursor(sort, last_key))
+            page.append(threat)
+            last_key = key
+        return ThreatPage(page, None)
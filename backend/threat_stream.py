@@ -0,0 +1,120 @@
+"""
+Real-Time Threat Stream
+Pushes new/updated/resolved threat events from the threat store to every subscriber
+"""
+
+import asyncio
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from json_codec import dumps, splice
+from threat_store import ThreatStore
+
+# (version, event type, encoded JSON payload)
+StreamEvent = Tuple[int, str, str]
+
+
+def _encode(message: Dict[str, Any]) -> str:
+    return dumps(message).decode('utf-8')
+
+
+class ThreatStream:
+    """Turns each snapshot's threat store changes into one shared event.
+
+    Events are encoded once and kept in a short history, so the cost of
+    a snapshot is independent of the number of connected clients. A
+    client that falls further behind than the history is sent a full
+    snapshot message instead.
+    """
+
+    def __init__(self, store: ThreatStore, build_summary: Callable[[Any], Dict[str, Any]], history: int = 256):
+        self.store = store
+        self.build_summary = build_summary
+        self.history = history
+        self.version = 0
+        self._store_version = 0  # store version the latest event was diffed against
+        self._summary: Dict[str, Any] = {}
+        self._health: Dict[str, Any] = {}
+        self._events: "deque[StreamEvent]" = deque()
+        self._floor = 0  # events after this version are all still in the history
+        self._snapshot_message: Optional[StreamEvent] = None
+        self._published: Optional[asyncio.Event] = None
+
+    def on_snapshot(self, snapshot):
+        """Snapshot engine listener; must run on the event loop after the store has applied the snapshot"""
+        changes = self.store.changes_since(self._store_version) if self.version else None
+        self._store_version = self.store.version
+        summary = self.build_summary(snapshot)
+        health = snapshot.system_health
+
+        previous_version = self.version
+        self.version = snapshot.version
+        self._snapshot_message = None
+
+        if changes is None:
+            # First snapshot, or one the store can no longer diff against: clients need a full resync
+            self._events.clear()
+            self._floor = self.version
+        elif changes.added or changes.changed or changes.removed:
+            self._append("delta", {
+                "type": "delta",
+                "version": self.version,
+                "previousVersion": previous_version,
+                "added": changes.added,
+                "updated": changes.changed,
+                "resolved": changes.removed,
+                "summary": summary,
+                "health": health
+            })
+        elif summary != self._summary or health != self._health:
+            self._append("health", {"type": "health", "version": self.version, "summary": summary, "health": health})
+        self._summary = summary
+        self._health = health
+
+        if self._published is not None:
+            published, self._published = self._published, asyncio.Event()
+            published.set()
+
+    def _append(self, event_type: str, message: Dict[str, Any]):
+        self._events.append((self.version, event_type, _encode(message)))
+        while len(self._events) > self.history:
+            self._floor = self._events.popleft()[0]
+
+    def snapshot_message(self) -> StreamEvent:
+        """Full current state, encoded once per version"""
+        if self._snapshot_message is None or self._snapshot_message[0] != self.version:
+            envelope = dumps({
+                "type": "snapshot",
+                "version": self.version,
+                "summary": self._summary,
+                "health": self._health
+            })
+            message = splice(envelope, "threats", self.store.encode_list(self.store.threats.values()))
+            self._snapshot_message = (self.version, "snapshot", message.decode('utf-8'))
+        return self._snapshot_message
+
+    def events_after(self, version: int) -> Optional[List[StreamEvent]]:
+        """Events newer than `version`, or None if the client needs a full snapshot instead.
+
+        That is the case when some events were already dropped from the
+        history, or when `version` is ahead of the stream, i.e. it was
+        issued before a restart.
+        """
+        if version == self.version:
+            return []
+        if version < self._floor or version > self.version:
+            return None
+        return [event for event in self._events if event[0] > version]
+
+    async def wait_for_events(self, version: int, timeout: float) -> Optional[List[StreamEvent]]:
+        """Wait up to `timeout` seconds for events newer than `version`"""
+        events = self.events_after(version)
+        if events is None or events:
+            return events
+        if self._published is None:
+            self._published = asyncio.Event()
+        try:
+            await asyncio.wait_for(self._published.wait(), timeout)
+        except asyncio.TimeoutError:
+            return []
+        return self.events_after(version)
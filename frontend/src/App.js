@@ -2,6 +2,7 @@ import React, { useState, useEffect } from 'react';
 import axios from 'axios';
 
 const API_BASE = 'http://localhost:8001';
+const STREAM_BASE = API_BASE.replace(/^http/, 'ws');
 
 function App() {
   const [threats, setThreats] = useState([]);
@@ -9,7 +10,39 @@ function App() {
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
 
+  const [streamMode, setStreamMode] = useState('connecting');
+
   useEffect(() => {
+    let socket = null;
+    let source = null;
+    let pollTimer = null;
+    let reconnectTimer = null;
+    let closed = false;
+
+    // Apply a snapshot/delta/health message from /api/stream
+    const applyMessage = (message) => {
+      if (message.type === 'snapshot') {
+        setThreats(message.threats || []);
+      } else if (message.type === 'delta') {
+        setThreats((current) => {
+          const changed = {};
+          [...(message.added || []), ...(message.updated || [])].forEach((threat) => { changed[threat.id] = threat; });
+          const resolved = new Set(message.resolved || []);
+          const next = current
+            .filter((threat) => !resolved.has(threat.id))
+            .map((threat) => changed[threat.id] || threat);
+          const known = new Set(next.map((threat) => threat.id));
+          (message.added || []).forEach((threat) => {
+            if (!known.has(threat.id)) next.push(threat);
+          });
+          return next;
+        });
+      }
+      if (message.summary) setSummary(message.summary);
+      setError(null);
+      setLoading(false);
+    };
+
     const fetchData = async () => {
       try {
         setLoading(true);
@@ -21,7 +54,7 @@ function App() {
         ]);
         
         setThreats(threatsRes.data.threats || []);
-        setSummary(summaryRes.data || {});
+        setSummary(summaryRes.data.stats || {});
       } catch (err) {
         setError(`Failed to fetch data: ${err.message}`);
         console.error('API Error:', err);
@@ -30,9 +63,68 @@ function App() {
       }
     };
 
-    fetchData();
-    const interval = setInterval(fetchData, 5000);
-    return () => clearInterval(interval);
+    // Last resort when neither push transport is available
+    const startPolling = () => {
+      setStreamMode('polling');
+      fetchData();
+      pollTimer = setInterval(fetchData, 5000);
+    };
+
+    const startEventSource = () => {
+      if (!window.EventSource) {
+        startPolling();
+        return;
+      }
+      let opened = false;
+      source = new EventSource(`${API_BASE}/api/stream`);
+      source.onopen = () => {
+        opened = true;
+        setStreamMode('sse');
+      };
+      ['snapshot', 'delta', 'health'].forEach((type) => {
+        source.addEventListener(type, (event) => applyMessage(JSON.parse(event.data)));
+      });
+      source.onerror = () => {
+        // EventSource reconnects by itself once it has connected; fall back only if it never did
+        if (!opened && !closed) {
+          source.close();
+          source = null;
+          startPolling();
+        }
+      };
+    };
+
+    const startWebSocket = () => {
+      if (!window.WebSocket) {
+        startEventSource();
+        return;
+      }
+      let opened = false;
+      socket = new WebSocket(`${STREAM_BASE}/api/stream`);
+      socket.onopen = () => {
+        opened = true;
+        setStreamMode('websocket');
+      };
+      socket.onmessage = (event) => applyMessage(JSON.parse(event.data));
+      socket.onclose = () => {
+        socket = null;
+        if (closed) return;
+        if (opened) {
+          reconnectTimer = setTimeout(startWebSocket, 2000);
+        } else {
+          startEventSource();
+        }
+      };
+    };
+
+    startWebSocket();
+    return () => {
+      closed = true;
+      if (socket) socket.close();
+      if (source) source.close();
+      clearInterval(pollTimer);
+      clearTimeout(reconnectTimer);
+    };
   }, []);
 
   const formatTimestamp = (timestamp) => {
@@ -75,7 +167,7 @@ function App() {
     <div style={{ background: '#0a0a0a', color: '#fff', minHeight: '100vh', padding: '20px', fontFamily: 'monospace' }}>
       <h1 style={{ color: '#00ff88', marginBottom: '20px' }}>🛡️ Cybersecurity Threat Monitor</h1>
       <div style={{ marginBottom: '20px', fontSize: '14px', color: '#888' }}>
-        Last updated: {new Date().toLocaleTimeString()} | Auto-refresh every 5s
+        Last updated: {new Date().toLocaleTimeString()} | {streamMode === 'polling' ? 'Auto-refresh every 5s' : `Live updates (${streamMode})`}
         {loading && <span style={{ color: '#00ff88' }}> (Refreshing...)</span>}
       </div>
 
@@ -111,7 +203,7 @@ function App() {
       ) : (
         <div style={{ display: 'flex', flexDirection: 'column', gap: '15px' }}>
           {threats.map((threat, index) => (
-            <div key={index} style={{ background: '#1a1a1a', border: '1px solid #333', borderRadius: '8px', padding: '20px' }}>
+            <div key={threat.id || index} style={{ background: '#1a1a1a', border: '1px solid #333', borderRadius: '8px', padding: '20px' }}>
               <div style={{ display: 'flex', justifyContent: 'space-between', alignItems: 'center', marginBottom: '10px' }}>
                 <span style={{ 
                   background: getSeverityColor(threat.severity), 